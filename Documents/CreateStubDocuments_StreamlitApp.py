@@ -1,8 +1,13 @@
+from functools import partial
+
 import streamlit as st
-import requests
-import json
-import time
-from urllib.parse import urlencode
+from Documents_CreateStubDocuments import (  # Import functions
+    DEFAULT_CHUNK_SIZE,
+    DEFAULT_MAX_WORKERS,
+    MONITORING,
+    create_stub_documents_chunked,
+)
+from streamlit_render import render_jobs, render_json, render_live_metrics, render_table, submit_job
 
 st.title("📄 Alation Stub Document Creator")
 
@@ -19,6 +24,8 @@ parent_folder_id = st.sidebar.number_input("📂 Parent Folder ID", value=57, mi
 nav_link_folder_ids = st.sidebar.text_input("🔗 Navigation Folder IDs (comma-separated)", "58, 59")
 num_stub_docs = st.sidebar.number_input("📑 Number of Stub Documents", value=3, min_value=1)
 max_retries = st.sidebar.number_input("🔄 Max Retries for Job Polling", value=100, min_value=1)
+chunk_size = st.sidebar.number_input("🧩 Documents per Request (chunk size)", value=DEFAULT_CHUNK_SIZE, min_value=1)
+max_workers = st.sidebar.number_input("⚙️ Concurrent Chunks", value=DEFAULT_MAX_WORKERS, min_value=1, max_value=32)
 
 # Convert nav_link_folder_ids from string to list
 nav_link_folder_ids = [int(x.strip()) for x in nav_link_folder_ids.split(",") if x.strip().isdigit()]
@@ -31,67 +38,79 @@ st.sidebar.markdown(
     "Alation is **not responsible** for its modification, use, or maintenance."
 )
 
-def create_stub_documents():
-    """Creates stub documents and returns the job ID."""
-    headers = {'Token': api_token}
-    payload = [
-        {
-            "title": f"Stub Document ({i+1} of {num_stub_docs})",
-            "document_hub_id": document_hub_id,
-            "template_id": template_id,
-            "parent_folder_id": parent_folder_id,
-            "nav_link_folder_ids": nav_link_folder_ids
-        }
-        for i in range(num_stub_docs)
-    ]
+def run_creation(job, chunks, **options):
+    """Background job body: creates the stub documents chunk by chunk and returns the summary."""
+    total_chunks = len(chunks) if chunks is not None else -(-options["num_stub_docs"] // options["chunk_size"])
+    finished = []
 
-    try:
-        response = requests.post(f"{base_url}/integration/v2/document/", headers=headers, json=payload)
-        response.raise_for_status()
-        response_data = response.json()
-        
-        if "job_id" in response_data:
-            st.success(f"✅ Stub documents submitted successfully. Job ID: {response_data['job_id']}")
-            return response_data["job_id"]
+    def show_chunk(result):
+        if result.status == MONITORING:
+            status = "⏳ unknown, still monitoring"
         else:
-            st.error("❌ API response does not contain a job ID.")
-            return None
-    except requests.exceptions.RequestException as e:
-        st.error(f"❌ Failed to create stub documents: {e}")
-        return None
-
-def get_job_output(job_id):
-    """Polls the job API until completion or failure."""
-    url = f"{base_url}/api/v1/bulk_metadata/job/?" + urlencode({'id': job_id})
-    
-    for attempt in range(max_retries):
-        try:
-            response = requests.get(url, headers={'Token': api_token})
-            response.raise_for_status()
-            response_json = response.json()
+            status = "❌ failed" if result.error else f"✅ {result.status}"
+        finished.append({
+            "documents": f"{result.start + 1}-{result.start + result.count}",
+            "job_id": result.job_id,
+            "status": status,
+            "error": result.error,
+        })
+        job.update(len(finished), message=f"{len(finished)} of {total_chunks} chunks", details=finished)
 
-            job_status = response_json.get("status", "unknown")
+    job.update(0, total_chunks)
+    return create_stub_documents_chunked(chunks=chunks, on_chunk=show_chunk, should_stop=job.is_cancelled,
+                                         **options)
 
-            if job_status == "running":
-                st.write(f"⏳ Job {job_id} is still running... (Attempt {attempt + 1}/{max_retries})")
-                time.sleep(10)
-            else:
-                st.success(f"✅ Job {job_id} completed with status: {job_status}")
-                return response_json
+def start_creation(chunks=None, options=None):
+    """Submits a chunked creation as a background job.
 
-        except requests.exceptions.RequestException as e:
-            st.error(f"❌ Error checking job status: {e}")
-            break
+    A retry passes only the failed `chunks` and the original job's
+    `options`; otherwise the sidebar settings are used.
+    """
+    if options is None:
+        options = dict(base_url=base_url, api_token=api_token, num_stub_docs=num_stub_docs,
+                       document_hub_id=document_hub_id, template_id=template_id, parent_folder_id=parent_folder_id,
+                       nav_link_folder_ids=nav_link_folder_ids, chunk_size=chunk_size, max_workers=max_workers,
+                       max_retries=max_retries)
+    if chunks:
+        label = f"Retry {len(chunks)} failed chunks"
+    else:
+        label = f"Create {options['num_stub_docs']} stub documents"
+    submit_job("stub-docs", label, partial(run_creation, chunks=chunks, **options), options=options)
 
-    st.error(f"❌ Job {job_id} did not complete within {max_retries} attempts. You may continue to monitor at {base_url}/monitor/active_tasks/.")
-    return None
+def show_creation(job):
+    if job.details:
+        render_table(list(job.details), key=f"chunks_{job.id}")
+    summary = job.result
+    if summary is None:
+        return
+    job_base_url = job.options["base_url"]
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Documents Created", summary["docs_created"])
+    col2.metric("Throughput", f"{summary['docs_per_sec']} docs/sec")
+    col3.metric("Failed Chunks", len(summary["failed_chunks"]))
+    if summary["monitoring_chunks"]:
+        st.warning(f"⏳ {len(summary['monitoring_chunks'])} chunks have jobs whose outcome is unknown; they may still "
+                   f"create their documents, so they are not retried. Monitor them at "
+                   f"{job_base_url}/monitor/active_tasks/.")
+    if summary["failed_chunks"]:
+        st.error(f"❌ {len(summary['failed_chunks'])} chunks failed. Use Retry to re-submit only those chunks. "
+                 f"You may continue to monitor at {job_base_url}/monitor/active_tasks/.")
+        if st.button(f"🔁 Retry {len(summary['failed_chunks'])} Failed Chunks", key=f"retry_{job.id}"):
+            start_creation([(c["start"], c["count"]) for c in summary["failed_chunks"]], job.options)
+            st.rerun()
+    elif job.status == "succeeded" and not summary["monitoring_chunks"]:
+        st.success(f"✅ All stub documents created across {len(summary['job_ids'])} jobs.")
+    render_json(summary, key=f"stub_summary_{job.id}", file_name="stub_documents_summary.json", expanded=False)
 
 if st.button("🚀 Create Stub Documents"):
     if not api_token:
         st.error("❌ API token is required.")
     else:
-        job_id = create_stub_documents()
-        if job_id:
-            job_response = get_job_output(job_id)
-            if job_response:
-                st.json(job_response)
+        start_creation()
+
+# Creation runs in the background: the page stays usable and several runs can be in flight
+st.subheader("Creation Jobs")
+render_jobs("stub-docs", show_creation)
+
+with st.expander("📈 API Metrics"):
+    render_live_metrics()
@@ -0,0 +1,283 @@
+import requests
+import urllib3
+import json
+import os
+import sys
+import time
+import argparse
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from urllib.parse import urlencode
+
+# Shared CSA modules (cache, client, ...) live at the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from alation_client import get_session
+from alation_poller import BackoffPolicy, watch_tasks
+from alation_ratelimit import THROTTLE_STATUSES
+
+# Bulk metadata jobs are polled every 5s at first, backing off to 60s while unchanged
+JOB_POLLING_POLICY = BackoffPolicy(initial=5.0, maximum=60.0, multiplier=1.5, jitter=0.2)
+DEFAULT_CHUNK_SIZE = 500
+DEFAULT_MAX_WORKERS = 4
+FAILED_JOB_STATUSES = ("failed", "failure", "error", "cancelled")
+# Chunk status when its job was submitted but never seen to finish; such chunks are never re-submitted
+MONITORING = "monitoring"
+
+ChunkResult = namedtuple("ChunkResult", ["start", "count", "job_id", "status", "error"])
+
+def build_stub_payload(num_stub_docs, document_hub_id, template_id, parent_folder_id, nav_link_folder_ids, start=0,
+                       count=None):
+    """Builds the bulk document payload for stub documents `start` .. `start + count` of `num_stub_docs`."""
+    count = num_stub_docs - start if count is None else count
+    return [
+        {
+            "title": f"Stub Document ({i+1} of {num_stub_docs})",
+            "document_hub_id": document_hub_id,
+            "template_id": template_id,
+            "parent_folder_id": parent_folder_id,
+            "nav_link_folder_ids": nav_link_folder_ids
+        }
+        for i in range(start, start + count)
+    ]
+
+def request_was_refused(error):
+    """True when a failed POST certainly created nothing, so sending it again cannot duplicate documents.
+
+    That is a connection that was never established, a throttling
+    response or a 4xx. Read timeouts and other 5xx may come back after the
+    server accepted the payload.
+    """
+    if isinstance(error, requests.exceptions.HTTPError):
+        status_code = error.response.status_code
+        return status_code in THROTTLE_STATUSES or 400 <= status_code < 500
+    if isinstance(error, requests.exceptions.ConnectTimeout):
+        return True
+    if isinstance(error, requests.exceptions.ConnectionError):
+        reason = getattr(error.args[0], "reason", None) if error.args else None
+        return isinstance(reason, urllib3.exceptions.NewConnectionError)
+    return False
+
+def create_stub_documents(base_url, api_token, num_stub_docs, document_hub_id, template_id, parent_folder_id,
+                          nav_link_folder_ids, start=0, count=None, session=None):
+    """Creates stub documents and returns the API response (with `job_id`), or `{"error": ..., "refused": ...}`.
+
+    `refused` is True only when the server certainly created nothing, see
+    `request_was_refused`.
+    """
+    payload = build_stub_payload(num_stub_docs, document_hub_id, template_id, parent_folder_id, nav_link_folder_ids,
+                                 start, count)
+
+    try:
+        response = (session or get_session(base_url, api_token)).post(
+            f"{base_url}/integration/v2/document/", json=payload
+        )
+        response.raise_for_status()
+        response_data = response.json()
+
+        if "job_id" not in response_data:
+            return {"error": "API response does not contain a job ID.", "refused": False}
+        return response_data
+    except requests.exceptions.RequestException as e:
+        return {"error": f"Failed to create stub documents: {e}", "refused": request_was_refused(e)}
+
+def check_job_status(base_url, api_token, job_id, session=None):
+    """Returns `(success, job_json, error_details)` for one bulk_metadata job."""
+    url = f"{base_url}/api/v1/bulk_metadata/job/?" + urlencode({'id': job_id})
+    try:
+        response = (session or get_session(base_url, api_token)).get(url)
+        response.raise_for_status()
+        return True, response.json(), None
+    except requests.exceptions.RequestException as e:
+        return False, None, {"error": f"Error checking job status: {e}"}
+
+def job_is_done(job):
+    return job.get("status", "unknown") != "running"
+
+def chunk_outcome(start, count, poll_result, base_url):
+    """Turns the final poll of a chunk's job into a ChunkResult.
+
+    A job that was still running when polling gave up, or whose status
+    could not be read, may yet create its documents: its chunk gets the
+    MONITORING status rather than a failure.
+    """
+    job_id = poll_result.key
+    if not poll_result.ok:
+        if poll_result.data is not None:
+            reason = f"did not complete within {poll_result.polls} attempts"
+        else:
+            reason = f"could not be polled ({poll_result.error['error']})"
+        error = (f"Job {job_id} {reason}; its outcome is unknown. "
+                 f"You may continue to monitor at {base_url}/monitor/active_tasks/.")
+        return ChunkResult(start, count, job_id, MONITORING, error)
+    status = str(poll_result.data.get("status", "unknown"))
+    error = f"Job {job_id} finished with status: {status}" if status.lower() in FAILED_JOB_STATUSES else None
+    return ChunkResult(start, count, job_id, status, error)
+
+def get_job_output(base_url, api_token, job_id, max_retries=100, on_poll=None, session=None):
+    """Polls the job API until completion or failure.
+
+    `on_poll(attempt, response_json)` is called while the job is still running.
+    Returns the final job JSON, or `{"error": ...}`.
+    """
+    attempts = []
+
+    def on_update(_, job):
+        attempts.append(job)
+        if on_poll and not job_is_done(job):
+            on_poll(len(attempts) - 1, job)
+
+    result = watch_tasks([job_id], lambda key: check_job_status(base_url, api_token, key, session),
+                         job_is_done, on_update=on_update, policy=JOB_POLLING_POLICY, max_polls=max_retries)[job_id]
+    if result.ok:
+        return result.data
+    return {"error": chunk_outcome(0, 0, result, base_url).error}
+
+def plan_chunks(num_stub_docs, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Splits `num_stub_docs` into `(start, count)` chunks of at most `chunk_size`."""
+    return [(start, min(chunk_size, num_stub_docs - start)) for start in range(0, num_stub_docs, chunk_size)]
+
+def run_chunks(base_url, api_token, num_stub_docs, document_hub_id, template_id, parent_folder_id,
+               nav_link_folder_ids, chunks, max_workers=DEFAULT_MAX_WORKERS, max_retries=100, on_chunk=None,
+               should_stop=None):
+    """Submit each `(start, count)` chunk with bounded concurrency, then watch all their jobs together.
+
+    `on_chunk(result)` is called with a ChunkResult as each chunk fails to
+    submit or its job finishes. Once `should_stop()` is true no further
+    chunks are submitted and their jobs are no longer watched; chunks
+    already in flight are reported as MONITORING with their job id.
+    Returns the list of ChunkResults.
+    """
+    session = get_session(base_url, api_token)
+    results = []
+    submitted = {}
+
+    def finish(result):
+        results.append(result)
+        if on_chunk:
+            on_chunk(result)
+
+    def submit(start, count):
+        response = create_stub_documents(base_url, api_token, num_stub_docs, document_hub_id, template_id,
+                                         parent_folder_id, nav_link_folder_ids, start, count, session=session)
+        if "error" in response and response["refused"]:
+            return ChunkResult(start, count, None, "error", response["error"])
+        if "error" in response:
+            # The server may have accepted the chunk anyway; re-sending it could create its documents twice
+            return ChunkResult(start, count, None, MONITORING,
+                               f"{response['error']} The documents may still be created. "
+                               f"You may continue to monitor at {base_url}/monitor/active_tasks/.")
+        return ChunkResult(start, count, response["job_id"], "submitted", None)
+
+    handled = set()
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futures = [pool.submit(submit, start, count) for start, count in chunks]
+        for future in as_completed(futures):
+            handled.add(future)
+            result = future.result()
+            if result.error:
+                finish(result)
+            else:
+                submitted[result.job_id] = result
+            if should_stop and should_stop():
+                pool.shutdown(wait=False, cancel_futures=True)
+                break
+    # Chunks in flight when the run stopped have landed by now; their jobs are reported, not watched
+    for future in futures:
+        if future not in handled and not future.cancelled():
+            result = future.result()
+            if not result.error:
+                result = result._replace(status=MONITORING, error=(
+                    f"Submitted as job {result.job_id} after the run was stopped. "
+                    f"You may continue to monitor at {base_url}/monitor/active_tasks/."))
+            finish(result)
+
+    def job_done(poll_result):
+        chunk = submitted[poll_result.key]
+        finish(chunk_outcome(chunk.start, chunk.count, poll_result, base_url))
+
+    watch_tasks(submitted, lambda job_id: check_job_status(base_url, api_token, job_id, session), job_is_done,
+                on_done=job_done, policy=JOB_POLLING_POLICY, max_polls=max_retries, max_concurrency=max_workers,
+                should_stop=should_stop)
+    return results
+
+def create_stub_documents_chunked(base_url, api_token, num_stub_docs, document_hub_id, template_id,
+                                  parent_folder_id, nav_link_folder_ids, chunk_size=DEFAULT_CHUNK_SIZE,
+                                  max_workers=DEFAULT_MAX_WORKERS, max_retries=100, chunk_retries=1, chunks=None,
+                                  on_chunk=None, should_stop=None):
+    """Create stub documents in chunks, re-submitting only the chunks that failed.
+
+    A chunk counts as failed when the server refused it (see
+    `request_was_refused`) or its job finished with a failed status. Chunks
+    whose submission or job outcome is unknown are reported under
+    `monitoring_chunks` and never re-submitted, since the server may still
+    create their documents. `chunks` restricts the run to
+    specific `(start, count)` chunks, e.g. the `failed_chunks` of an
+    earlier summary. `on_chunk(result)` is called as each chunk finishes.
+    `should_stop()` ends the run early, see `run_chunks`. Returns a summary
+    dict with every job id, the failed and monitoring chunks and the
+    throughput in docs/sec.
+    """
+    chunks = list(chunks) if chunks is not None else plan_chunks(num_stub_docs, chunk_size)
+    started = time.monotonic()
+    job_ids = []
+    monitoring = []
+    created = 0
+    for _ in range(chunk_retries + 1):
+        failed = []
+        for result in run_chunks(base_url, api_token, num_stub_docs, document_hub_id, template_id, parent_folder_id,
+                                 nav_link_folder_ids, chunks, max_workers, max_retries, on_chunk, should_stop):
+            if result.job_id:
+                job_ids.append(result.job_id)
+            if result.status == MONITORING:
+                monitoring.append(result)
+            elif result.error:
+                failed.append(result)
+            else:
+                created += result.count
+        chunks = [(result.start, result.count) for result in failed]
+        if not chunks or (should_stop and should_stop()):
+            break
+
+    elapsed = time.monotonic() - started
+    return {
+        "docs_created": created,
+        "elapsed_sec": round(elapsed, 2),
+        "docs_per_sec": round(created / elapsed, 2) if elapsed else 0.0,
+        "job_ids": job_ids,
+        "failed_chunks": [
+            {"start": result.start, "count": result.count, "job_id": result.job_id, "error": result.error}
+            for result in failed
+        ],
+        "monitoring_chunks": [
+            {"start": result.start, "count": result.count, "job_id": result.job_id, "error": result.error}
+            for result in monitoring
+        ],
+    }
+
+# Allow command-line execution
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Create Alation Stub Documents")
+    parser.add_argument("base_url", type=str, help="Alation BASE URL")
+    parser.add_argument("api_token", type=str, help="API Token")
+    parser.add_argument("--document-hub-id", type=int, default=7, help="Document Hub ID")
+    parser.add_argument("--template-id", type=int, default=72, help="Template ID")
+    parser.add_argument("--parent-folder-id", type=int, default=57, help="Parent Folder ID")
+    parser.add_argument("--nav-link-folder-ids", type=int, nargs="*", default=[58, 59], help="Navigation Folder IDs")
+    parser.add_argument("--num-stub-docs", type=int, default=3, help="Number of Stub Documents")
+    parser.add_argument("--max-retries", type=int, default=100, help="Max Retries for Job Polling")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="Stub documents per request")
+    parser.add_argument("--max-workers", type=int, default=DEFAULT_MAX_WORKERS, help="Chunks submitted at once")
+    parser.add_argument("--chunk-retries", type=int, default=1, help="Times to re-submit failed chunks")
+
+    args = parser.parse_args()
+
+    def print_chunk(result):
+        outcome = result.error or result.status
+        print(f"Chunk {result.start + 1}-{result.start + result.count}: {outcome}", file=sys.stderr)
+
+    summary = create_stub_documents_chunked(args.base_url, args.api_token, args.num_stub_docs, args.document_hub_id,
+                                            args.template_id, args.parent_folder_id, args.nav_link_folder_ids,
+                                            args.chunk_size, args.max_workers, args.max_retries, args.chunk_retries,
+                                            on_chunk=print_chunk)
+    print(json.dumps(summary, indent=4))
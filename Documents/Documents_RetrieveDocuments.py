@@ -1,29 +1,149 @@
 import requests
 import json
 import os
+import sys
 import argparse
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from itertools import islice
+
+# Shared CSA modules (cache, client, ...) live at the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from alation_cache import get_default_cache
+from alation_client import get_session
+
+DEFAULT_MAX_WORKERS = 8
+
+def fetch_document_info(base_url, api_token, doc_id, cache=None, session=None):
+    """Fetch document details from Alation API, serving repeats from `cache` when given."""
+    if cache is not None:
+        cached = cache.get(base_url, "document", doc_id)
+        if cached is not None:
+            return cached
 
-def fetch_document_info(base_url, api_token, doc_id):
-    """Fetch document details from Alation API."""
-    headers = {'Token': api_token}
-    
     try:
-        response = requests.get(
-            f"{base_url}/integration/v2/document/", headers=headers, params={'id': doc_id}
+        response = (session or get_session(base_url, api_token)).get(
+            f"{base_url}/integration/v2/document/", params={'id': doc_id}
         )
         response.raise_for_status()
-        return response.json()  # Return JSON response
+        data = response.json()  # Return JSON response
+        if cache is not None:
+            cache.set(base_url, "document", doc_id, data)
+        return data
     except requests.exceptions.RequestException as e:
         return {"error": str(e)}
 
+def fetch_document_batch(base_url, api_token, doc_ids, cache=None, session=None):
+    """Fetch several documents in one request (repeated `id` filters).
+
+    Returns `{doc_id: result}` where each result has the same shape as
+    `fetch_document_info` (a list holding the document, empty if not found).
+    """
+    try:
+        response = (session or get_session(base_url, api_token)).get(
+            f"{base_url}/integration/v2/document/", params={'id': list(doc_ids)}
+        )
+        response.raise_for_status()
+        by_id = {doc.get("id"): doc for doc in response.json() if isinstance(doc, dict)}
+    except requests.exceptions.RequestException as e:
+        return {doc_id: {"error": str(e)} for doc_id in doc_ids}
+
+    results = {doc_id: [by_id[doc_id]] if doc_id in by_id else [] for doc_id in doc_ids}
+    if cache is not None:
+        for doc_id, data in results.items():
+            cache.set(base_url, "document", doc_id, data)
+    return results
+
+def parse_doc_ids(spec):
+    """Expand an id spec such as "12", "1,2,3" or "10-20" (inclusive) into document ids."""
+    for part in str(spec).split(","):
+        part = part.strip()
+        if not part:
+            continue
+        if "-" in part:
+            start, end = part.split("-", 1)
+            yield from range(int(start), int(end) + 1)
+        else:
+            yield int(part)
+
+def fetch_documents(base_url, api_token, doc_ids, max_workers=DEFAULT_MAX_WORKERS, batch_size=1, cache=None):
+    """Yield `(doc_id, result)` pairs as concurrent fetches complete.
+
+    Ids are fetched over one pooled session, `batch_size` ids per request,
+    with at most `max_workers` requests in flight; cached documents are
+    yielded without a request.
+    """
+    session = get_session(base_url, api_token)
+    doc_ids = iter(doc_ids)
+
+    def batches():
+        while True:
+            batch = list(islice(doc_ids, batch_size))
+            if not batch:
+                return
+            if cache is not None:
+                misses = []
+                for doc_id in batch:
+                    cached = cache.get(base_url, "document", doc_id)
+                    if cached is None:
+                        misses.append(doc_id)
+                    else:
+                        yield doc_id, cached
+                batch = misses
+            if batch:
+                yield None, batch
+
+    def fetch(batch):
+        if len(batch) == 1:
+            return {batch[0]: fetch_document_info(base_url, api_token, batch[0], cache=cache, session=session)}
+        return fetch_document_batch(base_url, api_token, batch, cache=cache, session=session)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        pending = set()
+        for doc_id, item in batches():
+            if doc_id is not None:
+                yield doc_id, item
+                continue
+            pending.add(pool.submit(fetch, item))
+            if len(pending) >= max_workers * 2:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield from future.result().items()
+        for future in pending:
+            yield from future.result().items()
+
+def write_jsonl(results, out):
+    """Write `(doc_id, result)` pairs as JSON Lines, one document per line."""
+    count = 0
+    for doc_id, result in results:
+        out.write(json.dumps({"id": doc_id, "result": result}) + "\n")
+        count += 1
+    return count
+
 # Allow command-line execution
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Fetch Alation Document Information")
     parser.add_argument("base_url", type=str, help="Alation BASE URL")
     parser.add_argument("api_token", type=str, help="API Token")
-    parser.add_argument("doc_id", type=int, help="Document ID to fetch details")
+    parser.add_argument("doc_id", type=str, help="Document ID(s) to fetch: 12, 1,2,3 or 10-20")
+    parser.add_argument("--no-cache", action="store_true", help="Bypass the local metadata cache")
+    parser.add_argument("--max-workers", type=int, default=DEFAULT_MAX_WORKERS, help="Concurrent requests")
+    parser.add_argument("--batch-size", type=int, default=1,
+                        help="Ids per request; values above 1 need an instance that accepts repeated id filters")
+    parser.add_argument("--output", type=str, help="Write JSON Lines to this file instead of stdout")
 
     args = parser.parse_args()
 
-    result = fetch_document_info(args.base_url, args.api_token, args.doc_id)
-    print(json.dumps(result, indent=4))
+    cache = None if args.no_cache else get_default_cache()
+    doc_ids = list(parse_doc_ids(args.doc_id))
+    if len(doc_ids) == 1 and not args.output:
+        result = fetch_document_info(args.base_url, args.api_token, doc_ids[0], cache=cache)
+        print(json.dumps(result, indent=4))
+    else:
+        results = fetch_documents(args.base_url, args.api_token, doc_ids, args.max_workers, args.batch_size, cache)
+        if args.output:
+            with open(args.output, "w") as out:
+                count = write_jsonl(results, out)
+            print(f"Wrote {count} documents to {args.output}", file=sys.stderr)
+        else:
+            write_jsonl(results, sys.stdout)
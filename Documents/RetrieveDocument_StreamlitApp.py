@@ -1,5 +1,9 @@
+import io
 import streamlit as st
-from Documents_RetrieveDocuments import fetch_document_info  # Import function
+from Documents_RetrieveDocuments import fetch_document_info, fetch_documents, parse_doc_ids, write_jsonl  # Import functions
+from alation_cache import get_default_cache
+from alation_metrics import render_metrics
+from streamlit_render import cached_session, render_json
 
 st.title("📄 Alation Document Retriever")
 
@@ -7,7 +11,8 @@ st.title("📄 Alation Document Retriever")
 st.sidebar.header("🔧 API Configuration")
 base_url = st.sidebar.text_input("🔗 Alation BASE URL", "https://your-alation-instance.alationcloud.com")
 api_token = st.sidebar.text_input("🔑 API Token", type="password")
-doc_id = st.text_input("Enter Document ID:", "")
+doc_id = st.text_input("Enter Document ID(s):", "", help="A single id, a list (1,2,3) or a range (10-20)")
+use_cache = st.sidebar.checkbox("🗄️ Use local metadata cache", value=True)
 
 # 📌 Add Usage Notice in Sidebar
 st.sidebar.markdown("---")
@@ -23,9 +28,39 @@ if st.button("Fetch Document Info"):
     elif not api_token:
         st.error("❌ API token is required.")
     else:
-        # Call the function from Documents_RetrieveDocuments.py
-        data = fetch_document_info(base_url, api_token, doc_id)
-        if "error" in data:
-            st.error(f"❌ {data['error']}")
+        cache = get_default_cache() if use_cache else None
+        try:
+            doc_ids = list(parse_doc_ids(doc_id))
+        except ValueError:
+            st.error("❌ Document IDs must be numbers, lists (1,2,3) or ranges (10-20).")
+            st.stop()
+
+        if len(doc_ids) == 1:
+            # Call the function from Documents_RetrieveDocuments.py
+            data = fetch_document_info(base_url, api_token, doc_ids[0], cache=cache,
+                                       session=cached_session(base_url, api_token))
+            if "error" in data:
+                st.error(f"❌ {data['error']}")
+            else:
+                render_json(data, key="document", file_name=f"document_{doc_ids[0]}.json")  # Display document info
         else:
-            st.json(data)  # Display document info
+            out = io.StringIO()
+            errors = []
+
+            def track_errors(results):
+                for result_id, result in results:
+                    if isinstance(result, dict) and "error" in result:
+                        errors.append(result_id)
+                    yield result_id, result
+
+            with st.spinner(f"Fetching {len(doc_ids)} documents..."):
+                count = write_jsonl(track_errors(fetch_documents(base_url, api_token, doc_ids, cache=cache)), out)
+            st.success(f"✅ Fetched {count} documents ({len(errors)} errors).")
+            st.download_button("⬇️ Download JSON Lines", out.getvalue(), file_name="documents.jsonl",
+                               mime="application/jsonl")
+        if cache is not None:
+            stats = cache.stats()
+            st.caption(f"Cache hit rate: {stats['hit_rate']:.0%} ({stats['hits']} hits, {stats['misses']} misses)")
+
+with st.expander("📈 API Metrics"):
+    render_metrics(st.empty())
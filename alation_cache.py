@@ -0,0 +1,191 @@
+"""Persistent on-disk cache for Alation catalog metadata.
+
+Entries are JSON values in a SQLite file keyed by (base_url, kind, key),
+so any CSA script on the same machine shares them. Each entry expires after
+`ttl` seconds and is refreshed on its own the next time it is read, and
+the least recently used entries are evicted once `max_entries` is exceeded
+(checked every EVICT_EVERY writes). Writers such as the sensitivity updater
+call `invalidate` for the objects they change.
+
+Kinds in `PINNED_KINDS` record writes rather than copies of server data,
+so they are never evicted for space (a large run would evict its own
+records); they are dropped once older than `PINNED_MAX_AGE` instead.
+
+    from alation_cache import get_default_cache
+    cache = get_default_cache()
+    doc = cache.get(base_url, "document", doc_id)
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+
+DEFAULT_CACHE_PATH = os.environ.get(
+    "ALATION_CSA_CACHE",
+    os.path.join(os.path.expanduser("~"), ".cache", "alation_csa", "metadata.sqlite3"),
+)
+DEFAULT_TTL = 15 * 60
+DEFAULT_MAX_ENTRIES = 50_000
+EVICT_EVERY = 100
+PINNED_KINDS = ("attribute_sensitivity",)
+PINNED_MAX_AGE = 7 * 24 * 60 * 60
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    base_url TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    key TEXT NOT NULL,
+    value TEXT NOT NULL,
+    stored_at REAL NOT NULL,
+    accessed_at REAL NOT NULL,
+    PRIMARY KEY (base_url, kind, key)
+);
+CREATE INDEX IF NOT EXISTS entries_accessed_at ON entries (accessed_at);
+"""
+
+
+class MetadataCache:
+    """SQLite-backed TTL/LRU cache keyed by base_url, object kind and id."""
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, ttl=DEFAULT_TTL, max_entries=DEFAULT_MAX_ENTRIES):
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._writes = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=30)
+        if path != ":memory:":
+            self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+
+    def get(self, base_url, kind, key, max_age=None):
+        """Returns the cached value, or None if missing or older than `max_age` (default: the TTL)."""
+        now = time.time()
+        max_age = self.ttl if max_age is None else max_age
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, stored_at FROM entries WHERE base_url = ? AND kind = ? AND key = ?",
+                (base_url, kind, str(key)),
+            ).fetchone()
+            if row is None or now - row[1] > max_age:
+                self.misses += 1
+                return None
+            self._conn.execute(
+                "UPDATE entries SET accessed_at = ? WHERE base_url = ? AND kind = ? AND key = ?",
+                (now, base_url, kind, str(key)),
+            )
+            self.hits += 1
+        return json.loads(row[0])
+
+    def set(self, base_url, kind, key, value):
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?)",
+                (base_url, kind, str(key), json.dumps(value), now, now),
+            )
+            self._writes += 1
+            if self._writes % EVICT_EVERY == 0:
+                self._evict()
+
+    def set_many(self, base_url, kind, values):
+        """Stores every `{key: value}` of `values` in one transaction."""
+        now = time.time()
+        rows = [(base_url, kind, str(key), json.dumps(value), now, now) for key, value in values.items()]
+        with self._lock:
+            self._conn.executemany("INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?)", rows)
+            self._writes += len(rows)
+            if rows and self._writes % EVICT_EVERY < len(rows):
+                self._evict()
+
+    def get_many(self, base_url, kind, keys, max_age=None):
+        """Returns a `{key: value}` dict of the fresh entries among `keys`.
+
+        Keys are returned as strings.
+        """
+        now = time.time()
+        max_age = self.ttl if max_age is None else max_age
+        keys = [str(k) for k in keys]
+        found = {}
+        with self._lock:
+            for start in range(0, len(keys), 500):
+                chunk = keys[start:start + 500]
+                rows = self._conn.execute(
+                    "SELECT key, value FROM entries WHERE base_url = ? AND kind = ? AND stored_at >= ? "
+                    f"AND key IN ({','.join('?' * len(chunk))})",
+                    (base_url, kind, now - max_age, *chunk),
+                ).fetchall()
+                found.update((key, json.loads(value)) for key, value in rows)
+            self.hits += len(found)
+            self.misses += len(keys) - len(found)
+        return found
+
+    def invalidate(self, base_url, kind, key=None):
+        """Drops one entry, or every entry of `kind` when `key` is None."""
+        with self._lock:
+            if key is None:
+                self._conn.execute("DELETE FROM entries WHERE base_url = ? AND kind = ?", (base_url, kind))
+            else:
+                self._conn.execute(
+                    "DELETE FROM entries WHERE base_url = ? AND kind = ? AND key = ?",
+                    (base_url, kind, str(key)),
+                )
+
+    def invalidate_prefix(self, base_url, kind, prefix):
+        """Drops every entry of `kind` whose key starts with `prefix`."""
+        with self._lock:
+            self._conn.execute(
+                "DELETE FROM entries WHERE base_url = ? AND kind = ? AND substr(key, 1, ?) = ?",
+                (base_url, kind, len(prefix), prefix),
+            )
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM entries")
+
+    def _evict(self):
+        pinned = ",".join("?" * len(PINNED_KINDS))
+        (count,) = self._conn.execute(
+            f"SELECT COUNT(*) FROM entries WHERE kind NOT IN ({pinned})", PINNED_KINDS
+        ).fetchone()
+        overflow = count - self.max_entries
+        if overflow > 0:
+            self._conn.execute(
+                "DELETE FROM entries WHERE rowid IN "
+                f"(SELECT rowid FROM entries WHERE kind NOT IN ({pinned}) ORDER BY accessed_at LIMIT ?)",
+                (*PINNED_KINDS, overflow),
+            )
+        self._conn.execute(
+            f"DELETE FROM entries WHERE kind IN ({pinned}) AND stored_at < ?",
+            (*PINNED_KINDS, time.time() - PINNED_MAX_AGE),
+        )
+
+    def stats(self):
+        """Returns hit/miss counters for this process and the entry count."""
+        lookups = self.hits + self.misses
+        with self._lock:
+            (entries,) = self._conn.execute("SELECT COUNT(*) FROM entries").fetchone()
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": entries,
+        }
+
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+
+def get_default_cache():
+    """Returns the process-wide cache at DEFAULT_CACHE_PATH."""
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = MetadataCache()
+        return _default_cache
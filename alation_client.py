@@ -0,0 +1,139 @@
+"""Shared HTTP client for the Alation APIs.
+
+Every request in the repo goes through a session from this module. Sessions
+are cached per Alation instance and token (`get_session`), so scripts,
+worker pools and Streamlit reruns reuse the same keep-alive connections
+and TLS sessions. Each session:
+
+- paces its requests through the shared adaptive rate limiters in
+  `alation_ratelimit` and records them in `alation_metrics`;
+- applies `DEFAULT_TIMEOUT` to requests sent without a timeout;
+- retries idempotent requests (GET/HEAD/OPTIONS) on connection errors and
+  429/5xx responses; POSTs are retried by their callers, which know
+  whether a repeat is safe, using the same `RETRY_STATUSES` and
+  `retry_delay`;
+- accepts gzip/deflate responses (requests' default `Accept-Encoding`).
+
+HTTP/2 is opt-in: set `ALATION_CSA_HTTP2=1` (needs the `h2` package) to
+switch urllib3's HTTPS connections to HTTP/2. It is experimental in
+urllib3 and only works against servers that offer h2.
+"""
+import logging
+import os
+import random
+import threading
+import time
+
+import requests
+
+from alation_metrics import get_metrics
+from alation_ratelimit import THROTTLE_STATUSES, RateLimitedAdapter
+
+DEFAULT_POOL_SIZE = 8
+MAX_POOL_SIZE = 64  # connections kept per host by cached sessions
+DEFAULT_TIMEOUT = (10, 60)  # seconds to connect, seconds between bytes read
+DEFAULT_RETRIES = 4
+RETRY_METHODS = {"GET", "HEAD", "OPTIONS"}
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+logger = logging.getLogger(__name__)
+
+
+def retry_delay(attempt, cap=10.0):
+    """Jittered exponential backoff, in seconds, before retry `attempt` of a failed request."""
+    return min(cap, 0.5 * 2 ** attempt) * random.uniform(0.5, 1.0)
+
+
+class AlationAdapter(RateLimitedAdapter):
+    """RateLimitedAdapter with a default timeout and retries for idempotent requests.
+
+    Every attempt is paced and recorded separately; after 429/503 the
+    limiter has already paused for Retry-After, other failures wait a
+    short jittered backoff before the next attempt.
+    """
+
+    def __init__(self, timeout=DEFAULT_TIMEOUT, retries=DEFAULT_RETRIES, **kwargs):
+        super().__init__(**kwargs)
+        self.timeout = timeout
+        self.retries = retries
+
+    def send(self, request, **kwargs):
+        if kwargs.get("timeout") is None:
+            kwargs["timeout"] = self.timeout
+        attempts = self.retries + 1 if request.method in RETRY_METHODS else 1
+        for attempt in range(1, attempts + 1):
+            try:
+                response = super().send(request, **kwargs)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+                if attempt == attempts:
+                    raise
+                status_code = None
+            else:
+                status_code = response.status_code
+                if status_code not in RETRY_STATUSES or attempt == attempts:
+                    return response
+                response.close()
+            get_metrics().record_retry(request.method, request.url)
+            if status_code not in THROTTLE_STATUSES:
+                time.sleep(retry_delay(attempt))
+
+
+def _mount(session, pool_size):
+    adapter = AlationAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+_http2_enabled = None
+
+
+def enable_http2():
+    """Switches urllib3's HTTPS connections to HTTP/2. Returns False when `h2` is not installed."""
+    global _http2_enabled
+    if _http2_enabled is None:
+        try:
+            from urllib3.http2 import inject_into_urllib3
+
+            inject_into_urllib3()
+            _http2_enabled = True
+        except ImportError as e:
+            logger.warning("HTTP/2 not available, using HTTP/1.1: %s", e)
+            _http2_enabled = False
+    return _http2_enabled
+
+
+def build_session(api_token=None, pool_size=DEFAULT_POOL_SIZE):
+    """Returns a new keep-alive session sized for `pool_size` concurrent requests.
+
+    Without `api_token` no auth header is set, for callers that pass their own.
+    """
+    if os.environ.get("ALATION_CSA_HTTP2") == "1":
+        enable_http2()
+    session = _mount(requests.Session(), pool_size)
+    session.headers["accept"] = "application/json"
+    if api_token:
+        session.headers["Token"] = api_token
+    return session
+
+
+_sessions = {}
+_sessions_lock = threading.Lock()
+
+
+def get_session(base_url, api_token=None):
+    """Returns the process-wide session for `base_url` and `api_token`, building it on first use."""
+    key = (base_url.strip().rstrip("/"), api_token)
+    with _sessions_lock:
+        if key not in _sessions:
+            _sessions[key] = build_session(api_token, pool_size=MAX_POOL_SIZE)
+        return _sessions[key]
+
+
+def close_sessions():
+    """Closes and forgets every cached session, e.g. after a token is rotated."""
+    with _sessions_lock:
+        sessions = list(_sessions.values())
+        _sessions.clear()
+    for session in sessions:
+        session.close()
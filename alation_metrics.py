@@ -0,0 +1,249 @@
+"""Request-level latency and throughput metrics for the Alation APIs.
+
+`RateLimitedAdapter` records every HTTP request sent by an `alation_client`
+session: latency, bytes sent and received and status, per Alation
+instance, method and endpoint (numeric and UUID path segments are folded
+into `{id}`). Time spent waiting on the rate limiter and retries reported by
+callers are tracked too, as is connection reuse per urllib3 pool.
+
+    from alation_metrics import get_metrics
+    print(get_metrics().to_prometheus())
+"""
+import json
+import math
+import re
+import sys
+import threading
+import time
+import weakref
+from collections import deque
+from urllib.parse import urlsplit
+
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+MAX_SAMPLES = 10_000  # latencies kept per endpoint for percentiles
+METRIC_FORMATS = ("json", "prometheus")
+
+_ID_SEGMENT = re.compile(r"^(\d+|[0-9a-fA-F-]{8,})$")
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of `values`, or None when empty."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[max(1, math.ceil(pct / 100 * len(ordered))) - 1]
+
+
+def _rounded(value, digits=4):
+    return round(value, digits) if value is not None else None
+
+
+def endpoint_label(url):
+    """Returns `(instance, endpoint)` for a URL, with ids in the path replaced by `{id}`."""
+    parts = urlsplit(url)
+    segments = ["{id}" if _ID_SEGMENT.match(s) and any(c.isdigit() for c in s) else s
+                for s in parts.path.split("/")]
+    return f"{parts.scheme}://{parts.netloc}", "/".join(segments)
+
+
+class EndpointStats:
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.statuses = {}
+        self.latency_sum = 0.0
+        self.buckets = [0] * len(LATENCY_BUCKETS)
+        self.samples = deque(maxlen=MAX_SAMPLES)
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.retries = 0
+        self.wait_s = 0.0
+        self.first_started = None
+        self.last_finished = None
+
+
+class MetricsRegistry:
+    """Thread-safe per-endpoint request metrics for one process."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._endpoints = {}
+        self._connections = {}
+        self._pool_counts = weakref.WeakKeyDictionary()
+        self.started = time.time()
+
+    def _stats(self, key):
+        if key not in self._endpoints:
+            self._endpoints[key] = EndpointStats()
+        return self._endpoints[key]
+
+    def record_request(self, method, url, status_code, latency_s, bytes_sent=0, bytes_received=0, wait_s=0.0,
+                       pool=None):
+        """Records one finished request; `status_code` is None when it raised."""
+        instance, endpoint = endpoint_label(url)
+        now = time.time()
+        with self._lock:
+            stats = self._stats((instance, method, endpoint))
+            stats.count += 1
+            status = str(status_code) if status_code is not None else "error"
+            stats.statuses[status] = stats.statuses.get(status, 0) + 1
+            if status_code is None or status_code >= 400:
+                stats.errors += 1
+            stats.latency_sum += latency_s
+            for i, bound in enumerate(LATENCY_BUCKETS):
+                if latency_s <= bound:
+                    stats.buckets[i] += 1
+            stats.samples.append(latency_s)
+            stats.bytes_sent += bytes_sent
+            stats.bytes_received += bytes_received
+            stats.wait_s += wait_s
+            if stats.first_started is None:
+                stats.first_started = now - latency_s
+            stats.last_finished = now
+            if pool is not None and hasattr(pool, "num_connections"):
+                self._count_connections(instance, pool)
+
+    def _count_connections(self, instance, pool):
+        # Pools are dropped with their sessions, so their counters are folded into per-instance totals
+        seen_opened, seen_sent = self._pool_counts.get(pool, (0, 0))
+        opened, sent = self._connections.get(instance, (0, 0))
+        self._connections[instance] = (opened + pool.num_connections - seen_opened,
+                                       sent + pool.num_requests - seen_sent)
+        self._pool_counts[pool] = (pool.num_connections, pool.num_requests)
+
+    def record_retry(self, method, url):
+        """Counts a request the caller is about to send again."""
+        instance, endpoint = endpoint_label(url)
+        with self._lock:
+            self._stats((instance, method, endpoint)).retries += 1
+
+    def connection_stats(self):
+        """Returns `{instance: (connections_opened, requests_sent)}` as counted by the urllib3 pools."""
+        with self._lock:
+            return dict(self._connections)
+
+    def reset(self):
+        with self._lock:
+            self._endpoints.clear()
+            self._connections.clear()
+            self._pool_counts.clear()
+            self.started = time.time()
+
+    def summary(self):
+        """Returns a JSON-serialisable dict with one row per endpoint plus totals."""
+        with self._lock:
+            items = [(key, stats, list(stats.samples)) for key, stats in sorted(self._endpoints.items())]
+        endpoints = []
+        for (instance, method, endpoint), stats, samples in items:
+            window = (stats.last_finished - stats.first_started) if stats.count else 0.0
+            endpoints.append({
+                "instance": instance,
+                "method": method,
+                "endpoint": endpoint,
+                "requests": stats.count,
+                "errors": stats.errors,
+                "retries": stats.retries,
+                "statuses": dict(stats.statuses),
+                "req_per_s": round(stats.count / window, 2) if window > 0 else None,
+                "mean_s": round(stats.latency_sum / stats.count, 4) if stats.count else None,
+                "p50_s": _rounded(percentile(samples, 50)),
+                "p95_s": _rounded(percentile(samples, 95)),
+                "p99_s": _rounded(percentile(samples, 99)),
+                "max_s": _rounded(max(samples)) if samples else None,
+                "bytes_sent": stats.bytes_sent,
+                "bytes_received": stats.bytes_received,
+                "limiter_wait_s": round(stats.wait_s, 3),
+            })
+        connections = {}
+        for instance, (opened, sent) in self.connection_stats().items():
+            connections[instance] = {
+                "opened": opened,
+                "requests": sent,
+                "reuse_rate": round(1 - opened / sent, 4) if sent else None,
+            }
+        elapsed = time.time() - self.started
+        total = sum(row["requests"] for row in endpoints)
+        return {
+            "elapsed_s": round(elapsed, 2),
+            "requests": total,
+            "req_per_s": round(total / elapsed, 2) if elapsed else None,
+            "endpoints": endpoints,
+            "connections": connections,
+        }
+
+    def to_prometheus(self):
+        """Renders the metrics in the Prometheus text exposition format."""
+        with self._lock:
+            items = sorted(self._endpoints.items())
+            lines = [
+                "# TYPE alation_csa_http_requests_total counter",
+                "# TYPE alation_csa_http_request_duration_seconds histogram",
+                "# TYPE alation_csa_http_request_bytes_total counter",
+                "# TYPE alation_csa_http_response_bytes_total counter",
+                "# TYPE alation_csa_http_retries_total counter",
+                "# TYPE alation_csa_ratelimit_wait_seconds_total counter",
+            ]
+            for (instance, method, endpoint), stats in items:
+                labels = f'instance="{instance}",method="{method}",endpoint="{endpoint}"'
+                for status, count in sorted(stats.statuses.items()):
+                    lines.append(f'alation_csa_http_requests_total{{{labels},status="{status}"}} {count}')
+                for bound, count in zip(LATENCY_BUCKETS, stats.buckets):
+                    lines.append(f'alation_csa_http_request_duration_seconds_bucket{{{labels},le="{bound}"}} {count}')
+                lines.append(f'alation_csa_http_request_duration_seconds_bucket{{{labels},le="+Inf"}} {stats.count}')
+                lines.append(f"alation_csa_http_request_duration_seconds_sum{{{labels}}} {stats.latency_sum:.6f}")
+                lines.append(f"alation_csa_http_request_duration_seconds_count{{{labels}}} {stats.count}")
+                lines.append(f"alation_csa_http_request_bytes_total{{{labels}}} {stats.bytes_sent}")
+                lines.append(f"alation_csa_http_response_bytes_total{{{labels}}} {stats.bytes_received}")
+                lines.append(f"alation_csa_http_retries_total{{{labels}}} {stats.retries}")
+                lines.append(f"alation_csa_ratelimit_wait_seconds_total{{{labels}}} {stats.wait_s:.6f}")
+        lines.append("# TYPE alation_csa_http_connections_opened_total counter")
+        lines.append("# TYPE alation_csa_http_pool_requests_total counter")
+        for instance, (opened, sent) in sorted(self.connection_stats().items()):
+            lines.append(f'alation_csa_http_connections_opened_total{{instance="{instance}"}} {opened}')
+            lines.append(f'alation_csa_http_pool_requests_total{{instance="{instance}"}} {sent}')
+        return "\n".join(lines) + "\n"
+
+    def table(self):
+        """Returns the endpoint rows flattened for `st.dataframe`."""
+        return [{**row, "statuses": ", ".join(f"{k}: {v}" for k, v in sorted(row["statuses"].items()))}
+                for row in self.summary()["endpoints"]]
+
+    def export(self, fmt):
+        """Returns the metrics as `fmt` ("json" or "prometheus") text."""
+        if fmt == "prometheus":
+            return self.to_prometheus()
+        return json.dumps(self.summary(), indent=2)
+
+
+_default_metrics = MetricsRegistry()
+
+
+def get_metrics():
+    """Returns the process-wide registry every session records into."""
+    return _default_metrics
+
+
+def render_metrics(placeholder):
+    """Draws the process-wide metrics into a Streamlit `st.empty()` placeholder, replacing its content."""
+    metrics = get_metrics()
+    rows = metrics.table()
+    if not rows:
+        placeholder.caption("No API requests recorded yet.")
+        return
+    summary = metrics.summary()
+    reuse = ", ".join(f"{instance} {c['reuse_rate']:.0%}" for instance, c in summary["connections"].items()
+                      if c["reuse_rate"] is not None)
+    box = placeholder.container()
+    box.caption(f"{summary['requests']} requests, {summary['req_per_s']} req/s overall"
+                + (f"; connection reuse: {reuse}" if reuse else ""))
+    box.dataframe(rows)
+
+
+def write_metrics(fmt, path=None):
+    """Writes the process-wide metrics as `fmt` to `path`, or to stderr."""
+    text = get_metrics().export(fmt)
+    if path:
+        with open(path, "w") as f:
+            f.write(text)
+    else:
+        print(text, file=sys.stderr)
@@ -0,0 +1,111 @@
+"""Asyncio poller that watches many Alation tasks or jobs at once.
+
+Each id is polled on its own schedule: the interval grows exponentially
+(with jitter) while the status is unchanged, resets when it changes, and
+can be stretched by a server hint such as a task's running `duration_ms`.
+Status fetches are ordinary blocking calls returning
+`(success, data, error_details)`, like `cold_start.check_task_status`;
+they run in worker threads, bounded by `max_concurrency`, while callbacks
+run in the caller's thread so they can update Streamlit widgets directly.
+A `should_stop` callable (e.g. a background job's `is_cancelled`) ends
+every watch within `STOP_CHECK_INTERVAL` seconds.
+
+    results = watch_tasks(task_ids, fetch_status, is_done, on_update=show)
+"""
+import asyncio
+import random
+from collections import namedtuple
+
+BackoffPolicy = namedtuple("BackoffPolicy", ["initial", "maximum", "multiplier", "jitter"])
+PollResult = namedtuple("PollResult", ["key", "ok", "data", "error", "polls"])
+
+DEFAULT_POLICY = BackoffPolicy(initial=2.0, maximum=60.0, multiplier=1.6, jitter=0.2)
+DEFAULT_MAX_CONCURRENCY = 8
+DEFAULT_MAX_ERRORS = 3
+STOP_CHECK_INTERVAL = 0.5  # seconds between `should_stop` checks while sleeping
+
+
+def next_interval(policy, interval, hint=None):
+    """Returns the next base interval, honouring a server hint when larger."""
+    interval = min(policy.maximum, interval * policy.multiplier)
+    if hint:
+        interval = min(policy.maximum, max(interval, hint))
+    return interval
+
+
+def jittered(policy, interval):
+    return interval * random.uniform(1 - policy.jitter, 1 + policy.jitter)
+
+
+async def sleep_unless_stopped(seconds, should_stop=None):
+    """Sleeps `seconds`, returning early once `should_stop()` is true."""
+    if should_stop is None:
+        await asyncio.sleep(seconds)
+        return
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + seconds
+    while not should_stop():
+        remaining = deadline - loop.time()
+        if remaining <= 0:
+            return
+        await asyncio.sleep(min(remaining, STOP_CHECK_INTERVAL))
+
+
+async def watch_tasks_async(keys, fetch_status, is_done, on_update=None, on_done=None, policy=DEFAULT_POLICY,
+                            interval_hint=None, max_polls=None, max_errors=DEFAULT_MAX_ERRORS,
+                            max_concurrency=DEFAULT_MAX_CONCURRENCY, should_stop=None):
+    """Polls every key until `is_done(data)`; returns `{key: PollResult}`.
+
+    `on_update(key, data)` is called after every successful poll and
+    `on_done(result)` once per key. `interval_hint(data)` may return a
+    minimum number of seconds before the next poll. A key gives up after
+    `max_polls` polls or `max_errors` consecutive failed fetches, and
+    every key stops, unfinished, once `should_stop()` is true.
+    """
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def watch(key):
+        interval = policy.initial
+        polls = errors = 0
+        last_status = None
+        while True:
+            if should_stop and should_stop():
+                return PollResult(key, False, None, {"error": "Cancelled"}, polls)
+            async with semaphore:
+                success, data, error_details = await asyncio.to_thread(fetch_status, key)
+            polls += 1
+            if success:
+                errors = 0
+                if on_update:
+                    on_update(key, data)
+                if is_done(data):
+                    return PollResult(key, True, data, None, polls)
+                status = data.get("status") if isinstance(data, dict) else None
+                if status != last_status:
+                    interval = policy.initial
+                    last_status = status
+                else:
+                    interval = next_interval(policy, interval, interval_hint(data) if interval_hint else None)
+            else:
+                errors += 1
+                if errors >= max_errors:
+                    return PollResult(key, False, None, error_details, polls)
+                interval = next_interval(policy, interval)
+            if max_polls and polls >= max_polls:
+                return PollResult(key, False, data if success else None,
+                                  {"error": f"Gave up after {polls} polls"}, polls)
+            await sleep_unless_stopped(jittered(policy, interval), should_stop)
+
+    async def watch_and_report(key):
+        result = await watch(key)
+        if on_done:
+            on_done(result)
+        return result
+
+    results = await asyncio.gather(*(watch_and_report(key) for key in dict.fromkeys(keys)))
+    return {result.key: result for result in results}
+
+
+def watch_tasks(keys, fetch_status, is_done, **kwargs):
+    """Blocking wrapper around `watch_tasks_async` for scripts and Streamlit."""
+    return asyncio.run(watch_tasks_async(keys, fetch_status, is_done, **kwargs))
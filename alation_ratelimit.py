@@ -0,0 +1,181 @@
+"""Client-side adaptive rate limiting shared by every Alation API call.
+
+One `AdaptiveRateLimiter` exists per Alation instance (scheme + host) and
+endpoint family (`/ajax/`, `/api/v1/`, `/integration/v2/`, `/nsapi/`).
+Each limiter is a token bucket plus a concurrency cap, both tuned AIMD
+style after a slow start: until the first throttle every accepted request
+raises the rate and the cap by a whole step (doubling them about once per
+second), after that each accepted request nudges them up additively,
+and a 429/503 halves them (at most once per `cooldown` seconds, so a burst
+of throttled in-flight requests counts once) and honours Retry-After. Throughput settles
+near the highest rate the server accepts without throttling.
+
+Sessions built by `alation_client` mount `RateLimitedAdapter`, so callers
+do not need to touch the limiter directly.
+"""
+import threading
+import time
+from urllib.parse import urlsplit
+
+from requests.adapters import HTTPAdapter
+
+from alation_metrics import get_metrics
+
+ENDPOINT_FAMILIES = ("/ajax/", "/api/v1/", "/integration/v2/", "/nsapi/")
+THROTTLE_STATUSES = {429, 503}
+
+DEFAULT_RATE = 10.0  # requests per second
+DEFAULT_MIN_RATE = 0.2
+DEFAULT_MAX_RATE = 500.0
+DEFAULT_CONCURRENCY = 8
+DEFAULT_MAX_CONCURRENCY = 64
+
+
+def endpoint_family(path):
+    """Returns the endpoint family prefix of a URL path, or "other"."""
+    for family in ENDPOINT_FAMILIES:
+        if family in path:
+            return family
+    return "other"
+
+
+def parse_retry_after(value):
+    try:
+        return max(0.0, float(value))
+    except (TypeError, ValueError):
+        return None
+
+
+class AdaptiveRateLimiter:
+    """Token bucket with an AIMD-tuned rate and concurrency cap."""
+
+    def __init__(self, rate=DEFAULT_RATE, concurrency=DEFAULT_CONCURRENCY, min_rate=DEFAULT_MIN_RATE,
+                 max_rate=DEFAULT_MAX_RATE, max_concurrency=DEFAULT_MAX_CONCURRENCY, increase=1.0, decrease=0.5,
+                 cooldown=1.0):
+        self.rate = rate
+        self.concurrency = float(concurrency)
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.max_concurrency = max_concurrency
+        self.increase = increase
+        self.decrease = decrease
+        self.cooldown = cooldown
+        self.tokens = 1.0
+        self.in_flight = 0
+        self.throttled = 0
+        self.slow_start = True
+        self.paused_until = 0.0
+        self._decreased_at = float("-inf")
+        self._updated = time.monotonic()
+        self._cond = threading.Condition()
+
+    def _refill(self, now):
+        self.tokens = min(max(1.0, self.rate), self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self):
+        """Blocks until a request may be sent."""
+        with self._cond:
+            while True:
+                now = time.monotonic()
+                if now < self.paused_until:
+                    self._cond.wait(self.paused_until - now)
+                    continue
+                self._refill(now)
+                if self.tokens >= 1 and self.in_flight < int(self.concurrency):
+                    self.tokens -= 1
+                    self.in_flight += 1
+                    return
+                wait = (1 - self.tokens) / self.rate if self.tokens < 1 else None
+                self._cond.wait(wait)
+
+    def release(self, status_code=None, retry_after=None):
+        """Records the outcome of a request sent after `acquire`."""
+        with self._cond:
+            self.in_flight -= 1
+            if status_code in THROTTLE_STATUSES:
+                self.throttled += 1
+                now = time.monotonic()
+                self.slow_start = False
+                if now - self._decreased_at >= self.cooldown:
+                    self._decreased_at = now
+                    self.rate = max(self.min_rate, self.rate * self.decrease)
+                    self.concurrency = max(1.0, self.concurrency * self.decrease)
+                    self.tokens = min(self.tokens, 0.0)
+                if retry_after:
+                    self.paused_until = max(self.paused_until, now + retry_after)
+            elif status_code is not None and status_code < 500:
+                step = self.increase if self.slow_start else self.increase / self.rate
+                self.rate = min(self.max_rate, self.rate + step)
+                self.concurrency = min(self.max_concurrency,
+                                       self.concurrency + (1 if self.slow_start else 1 / self.concurrency))
+            self._cond.notify_all()
+
+    def snapshot(self):
+        with self._cond:
+            return {
+                "rate": round(self.rate, 2),
+                "concurrency": int(self.concurrency),
+                "in_flight": self.in_flight,
+                "throttled": self.throttled,
+                "slow_start": self.slow_start,
+            }
+
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+
+def get_limiter(url):
+    """Returns the shared limiter for the instance and endpoint family of `url`."""
+    parts = urlsplit(url)
+    key = (f"{parts.scheme}://{parts.netloc}", endpoint_family(parts.path))
+    with _limiters_lock:
+        if key not in _limiters:
+            _limiters[key] = AdaptiveRateLimiter()
+        return _limiters[key]
+
+
+def limiter_snapshots():
+    """Returns `{(instance, family): snapshot}` for every limiter in use."""
+    with _limiters_lock:
+        limiters = dict(_limiters)
+    return {key: limiter.snapshot() for key, limiter in limiters.items()}
+
+
+def _body_size(body):
+    if isinstance(body, (bytes, str)):
+        return len(body)
+    return 0
+
+
+class RateLimitedAdapter(HTTPAdapter):
+    """HTTPAdapter that paces every request through the shared limiters.
+
+    Each request is also recorded in `alation_metrics`; unless streamed, the
+    body is read here so the latency covers the whole transfer.
+    """
+
+    def send(self, request, **kwargs):
+        limiter = get_limiter(request.url)
+        queued = time.monotonic()
+        limiter.acquire()
+        started = time.monotonic()
+        response = None
+        retry_after = None
+        try:
+            response = super().send(request, **kwargs)
+            if not kwargs.get("stream"):
+                response.content
+            retry_after = parse_retry_after(response.headers.get("Retry-After"))
+            return response
+        finally:
+            status_code = response.status_code if response is not None else None
+            limiter.release(status_code, retry_after)
+            raw = getattr(response, "raw", None)
+            get_metrics().record_request(
+                request.method, request.url, status_code, time.monotonic() - started,
+                bytes_sent=_body_size(request.body),
+                bytes_received=raw.tell() if hasattr(raw, "tell") else 0,
+                wait_s=started - queued, pool=getattr(raw, "_pool", None),
+            )
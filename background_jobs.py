@@ -0,0 +1,182 @@
+"""Background jobs for long-running actions started from the Streamlit apps.
+
+Sensitivity writes, stub document creation and cold start tracking run for
+minutes. Run inline, they freeze the page, and any widget interaction
+reruns the script and abandons them. Instead the apps submit them to the
+process-wide `JobRegistry`, whose worker threads outlive script reruns,
+and read each job's progress back on every rerun. The registry is shared
+by every browser session for its thread pool and per-key deduplication;
+`streamlit_render.submit_job` records which jobs belong to which session.
+
+    job = get_registry().submit("sensitivity", "Set 42", lambda job: work(job))
+    ...
+    for job in get_registry().jobs("sensitivity"):
+        st.progress(job.fraction)
+
+Job functions take the `Job` as their only argument. They report through
+`job.update(...)`, must not call Streamlit (they have no script context),
+and should stop early once `job.is_cancelled()` is true; most CSA helpers
+accept it as `should_stop`. Threads rather than processes keep the shared
+client sessions, rate limiters and metrics in play; the work is I/O bound.
+"""
+import itertools
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+DEFAULT_MAX_JOBS = 4  # jobs running at once; later ones queue
+DEFAULT_KEEP_FINISHED = 50  # finished jobs kept for display
+ACTIVE_STATUSES = ("queued", "running")
+
+logger = logging.getLogger(__name__)
+
+
+class Job:
+    """State of one background job, updated by its worker and read by the UI."""
+
+    def __init__(self, job_id, kind, label, key=None, options=None):
+        self.id = job_id
+        self.kind = kind
+        self.label = label
+        self.key = key
+        self.options = options
+        self.status = "queued"
+        self.done = 0
+        self.total = None
+        self.message = ""
+        self.details = None
+        self.result = None
+        self.error = None
+        self.created = time.time()
+        self.started = None
+        self.finished = None
+        self.future = None
+        self._cancel = threading.Event()
+
+    @property
+    def active(self):
+        return self.status in ACTIVE_STATUSES
+
+    @property
+    def fraction(self):
+        """Share of the work done, between 0 and 1 (0 while the total is unknown)."""
+        if self.status == "succeeded":
+            return 1.0
+        return min(1.0, self.done / self.total) if self.total else 0.0
+
+    @property
+    def elapsed_s(self):
+        if self.started is None:
+            return 0.0
+        return (self.finished or time.time()) - self.started
+
+    def update(self, done=None, total=None, message=None, details=None):
+        """Reports progress; only the given fields change."""
+        if done is not None:
+            self.done = done
+        if total is not None:
+            self.total = total
+        if message is not None:
+            self.message = message
+        if details is not None:
+            self.details = details
+
+    def cancel(self):
+        """Asks the job to stop; a job that has not started yet never runs."""
+        self._cancel.set()
+        if self.future is not None and self.future.cancel():
+            self.status = "cancelled"
+            self.finished = time.time()
+
+    def is_cancelled(self):
+        return self._cancel.is_set()
+
+
+class JobRegistry:
+    """Runs jobs on a bounded thread pool and keeps them for the UI to read."""
+
+    def __init__(self, max_workers=DEFAULT_MAX_JOBS, keep_finished=DEFAULT_KEEP_FINISHED):
+        self.keep_finished = keep_finished
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="csa-job")
+        self._jobs = {}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def submit(self, kind, label, fn, key=None, options=None):
+        """Starts `fn(job)` in the background and returns the Job.
+
+        At most one active job per `(kind, key)` is allowed when `key` is
+        given, e.g. one writer per checkpoint journal; submitting another
+        raises ValueError. `options` are kept on the job as submitted, e.g.
+        to retry it with the same settings.
+        """
+        with self._lock:
+            if key is not None:
+                for job in self._jobs.values():
+                    if job.kind == kind and job.key == key and job.active:
+                        # The running job may belong to another session, so its label is not shown
+                        raise ValueError(f"A {kind} job for the same target is already running (job {job.id})")
+            job = Job(next(self._ids), kind, label, key, options)
+            self._jobs[job.id] = job
+            self._prune()
+        job.future = self._pool.submit(self._run, job, fn)
+        return job
+
+    def _run(self, job, fn):
+        job.status = "running"
+        job.started = time.time()
+        try:
+            job.result = fn(job)
+            job.status = "cancelled" if job.is_cancelled() else "succeeded"
+        except Exception as e:
+            logger.exception("Background job %s (%s) failed", job.id, job.label)
+            job.error = f"{type(e).__name__}: {e}"
+            job.status = "failed"
+        finally:
+            job.finished = time.time()
+
+    def _prune(self):
+        finished = [job for job in self._jobs.values() if not job.active]
+        for job in finished[:max(0, len(finished) - self.keep_finished)]:
+            del self._jobs[job.id]
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def jobs(self, kind=None):
+        """Returns the jobs of `kind` (all when None), newest first."""
+        with self._lock:
+            jobs = list(self._jobs.values())
+        return [job for job in reversed(jobs) if kind is None or job.kind == kind]
+
+    def cancel(self, job_id):
+        job = self.get(job_id)
+        if job is not None:
+            job.cancel()
+        return job
+
+    def clear_finished(self, kind=None, job_ids=None):
+        """Forgets finished jobs of `kind` (all when None), only those in `job_ids` when given."""
+        with self._lock:
+            for job in list(self._jobs.values()):
+                if not job.active and (kind is None or job.kind == kind) and (job_ids is None or job.id in job_ids):
+                    del self._jobs[job.id]
+
+
+_default_registry = None
+_default_registry_lock = threading.Lock()
+
+
+def get_registry():
+    """Returns the process-wide registry shared by every app and browser session.
+
+    Apps should list jobs through `streamlit_render.session_jobs`, not `jobs`,
+    so each session only sees its own.
+    """
+    global _default_registry
+    with _default_registry_lock:
+        if _default_registry is None:
+            _default_registry = JobRegistry()
+        return _default_registry
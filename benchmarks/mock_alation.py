@@ -0,0 +1,310 @@
+"""Local stand-in for the Alation endpoints the CSA utilities call.
+
+Serves catalog set members (with X-Total-Count and title `search`),
+sensitivity writes, document reads and bulk creation with bulk_metadata
+jobs, and the nsapi cold start and tasks endpoints. Latency, 5xx error rate and throttling are configurable:
+`throttle_rate` answers a random share of requests with 429, and
+`rate_limit` enforces a requests/sec budget the way a real instance would,
+answering the excess with 429 and Retry-After.
+
+    python benchmarks/mock_alation.py --port 8080 --members 100000 --latency 0.02 --rate-limit 200
+
+or from Python:
+
+    server = MockAlation(MockConfig(members=100_000)).start()
+    ...  # point base_url at server.base_url
+    server.stop()
+
+`start_in_process` runs it in a child process instead, as the benchmarks do.
+"""
+import argparse
+import itertools
+import json
+import multiprocessing
+import random
+import re
+import threading
+import time
+import uuid
+from collections import namedtuple
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+# `latency` seconds per request (+/- `jitter` share), `error_rate`/`throttle_rate`
+# shares answered 500/429, `rate_limit` requests/sec (0 = unlimited) and how
+# long bulk_metadata jobs and cold start tasks run, in seconds. Without
+# `report_sensitivity` members carry no `is_sensitive`, as on some instances
+MockConfig = namedtuple(
+    "MockConfig",
+    ["members", "latency", "jitter", "error_rate", "throttle_rate", "rate_limit", "retry_after", "job_duration",
+     "task_duration", "report_sensitivity"],
+    defaults=[1000, 0.01, 0.5, 0.0, 0.0, 0.0, 1, 1.0, 2.0, True],
+)
+
+MEMBERS_PATH = re.compile(r"^/api/v1/catalog_set/(\d+)/members/$")
+SENSITIVITY_PATH = re.compile(r"^/ajax/set_attr_sensitivity/(\d+)/$")
+COLD_START_PATH = re.compile(r"^/nsapi/api/v3/orgs/[^/]+/data_product/cold_start_from_data_product_id$")
+TASK_PATH = re.compile(r"^/nsapi/api/v1/accounts/[^/]+/tasks/([^/]+)$")
+
+ATTRIBUTES_PER_TABLE = 20
+TABLES_PER_SCHEMA = 50
+SCHEMAS_PER_DS = 10
+
+
+def mock_member(member_id):
+    """Builds member `member_id`: every 21st member is a table, the rest are its attributes."""
+    table_id = member_id // (ATTRIBUTES_PER_TABLE + 1)
+    schema_id = table_id // TABLES_PER_SCHEMA
+    ds_id = schema_id // SCHEMAS_PER_DS
+    member = {
+        "id": member_id,
+        "otype": "table" if member_id % (ATTRIBUTES_PER_TABLE + 1) == 0 else "attribute",
+        "title": f"column_{member_id}",
+        "table": {"id": table_id, "title": f"table_{table_id}"},
+        "schema": {"id": schema_id, "title": f"schema_{schema_id}"},
+        "ds": {"id": ds_id, "title": f"ds_{ds_id}"},
+    }
+    if member["otype"] == "table":
+        member["title"] = member["table"]["title"]
+    return member
+
+
+class MockAlation:
+    """Threaded mock server holding the state its endpoints mutate."""
+
+    def __init__(self, config=MockConfig(), host="127.0.0.1", port=0):
+        self.config = config
+        self.sensitive = set()
+        self.jobs = {}
+        self.tasks = {}
+        self.requests = {}
+        self._searches = {}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._tokens = float(config.rate_limit)
+        self._refilled = time.monotonic()
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _next_id(self):
+        with self._lock:
+            return next(self._ids)
+
+    def _admit(self, route):
+        """Applies latency and failure injection; returns `(status, headers)` to fail with, or None."""
+        config = self.config
+        with self._lock:
+            self.requests[route] = self.requests.get(route, 0) + 1
+            if config.rate_limit:
+                now = time.monotonic()
+                self._tokens = min(config.rate_limit, self._tokens + (now - self._refilled) * config.rate_limit)
+                self._refilled = now
+                if self._tokens < 1:
+                    return 429, {"Retry-After": str(config.retry_after)}
+                self._tokens -= 1
+        if config.latency:
+            time.sleep(config.latency * random.uniform(1 - config.jitter, 1 + config.jitter))
+        if random.random() < config.throttle_rate:
+            return 429, {"Retry-After": str(config.retry_after)}
+        if random.random() < config.error_rate:
+            return 500, {}
+        return None
+
+    def _handler_class(self):
+        mock = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # Headers and body go out in separate writes; Nagle would delay keep-alive responses by ~40ms
+            disable_nagle_algorithm = True
+
+            def log_message(self, *args):
+                pass
+
+            def send_json(self, status, body, headers=None):
+                data = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(data)
+
+            def handle_route(self, method):
+                parts = urlsplit(self.path)
+                query = parse_qs(parts.query)
+                body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+                route = mock.route(method, parts.path)
+                if route is None:
+                    return self.send_json(404, {"detail": "Not found"})
+                failure = mock._admit(route)
+                if failure:
+                    status, headers = failure
+                    return self.send_json(status, {"detail": "Injected failure"}, headers)
+                status, payload, headers = getattr(mock, route)(parts.path, query, body)
+                self.send_json(status, payload, headers)
+
+            def do_GET(self):
+                self.handle_route("GET")
+
+            def do_POST(self):
+                self.handle_route("POST")
+
+        return Handler
+
+    def route(self, method, path):
+        """Maps a request to the name of the method that serves it."""
+        if method == "GET" and MEMBERS_PATH.match(path):
+            return "members"
+        if method == "POST" and SENSITIVITY_PATH.match(path):
+            return "set_sensitivity"
+        if path == "/integration/v2/document/":
+            return "get_documents" if method == "GET" else "create_documents"
+        if method == "GET" and path == "/api/v1/bulk_metadata/job/":
+            return "job_status"
+        if method == "POST" and COLD_START_PATH.match(path):
+            return "cold_start"
+        if method == "GET" and TASK_PATH.match(path):
+            return "task_status"
+        return None
+
+    # --- Endpoints: each returns (status, payload, headers) ---
+
+    def _matching_ids(self, search):
+        ids = range(1, self.config.members + 1)
+        if not search:
+            return ids
+        with self._lock:
+            if search not in self._searches:
+                needle = search.lower()
+                self._searches[search] = [i for i in ids if needle in mock_member(i)["title"].lower()]
+            return self._searches[search]
+
+    def members(self, path, query, body):
+        skip = int(query.get("skip", ["0"])[0])
+        limit = int(query.get("limit", ["100"])[0])
+        ids = self._matching_ids(query.get("search", [""])[0])
+        page = [mock_member(i) for i in ids[skip:skip + limit]]
+        if self.config.report_sensitivity:
+            for member in page:
+                member["is_sensitive"] = member["id"] in self.sensitive
+        return 200, page, {"X-Total-Count": str(len(ids))}
+
+    def set_sensitivity(self, path, query, body):
+        attr_id = int(SENSITIVITY_PATH.match(path).group(1))
+        action = parse_qs(body.decode()).get("action", [""])[0]
+        with self._lock:
+            if action == "mark_sensitive":
+                self.sensitive.add(attr_id)
+            elif action == "mark_unsensitive":
+                self.sensitive.discard(attr_id)
+            else:
+                return 400, {"detail": f"Unknown action {action!r}"}, {}
+        return 200, {}, {}
+
+    def get_documents(self, path, query, body):
+        return 200, [{"id": int(doc_id), "title": f"Document {doc_id}"} for doc_id in query.get("id", [])], {}
+
+    def create_documents(self, path, query, body):
+        documents = json.loads(body or b"[]")
+        job_id = self._next_id()
+        self.jobs[job_id] = (time.monotonic(), len(documents))
+        return 200, {"job_id": job_id}, {}
+
+    def job_status(self, path, query, body):
+        job_id = int(query.get("id", ["0"])[0])
+        if job_id not in self.jobs:
+            return 404, {"detail": "Job not found"}, {}
+        started, count = self.jobs[job_id]
+        if time.monotonic() - started < self.config.job_duration:
+            return 200, {"id": job_id, "status": "running"}, {}
+        return 200, {"id": job_id, "status": "successful", "result": {"created_objects": count}}, {}
+
+    def cold_start(self, path, query, body):
+        task_id = str(uuid.uuid4())
+        self.tasks[task_id] = time.time()
+        return 200, {"id": task_id, "status": "PENDING"}, {}
+
+    def task_status(self, path, query, body):
+        task_id = TASK_PATH.match(path).group(1)
+        if task_id not in self.tasks:
+            return 404, {"detail": "Task not found"}, {}
+        created = self.tasks[task_id]
+        running_for = time.time() - created
+        task = {
+            "id": task_id,
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(created)),
+            "duration_ms": int(min(running_for, self.config.task_duration) * 1000),
+            "status": "RUNNING",
+        }
+        if running_for >= self.config.task_duration:
+            task["status"] = "SUCCESS"
+            task["completed_at"] = time.strftime("%Y-%m-%dT%H:%M:%SZ",
+                                                 time.gmtime(created + self.config.task_duration))
+        return 200, task, {}
+
+
+def _serve(config, host, port, ready):
+    server = MockAlation(config, host, port).start()
+    ready.put(server.base_url)
+    server._thread.join()
+
+
+def start_in_process(config=MockConfig(), host="127.0.0.1", port=0):
+    """Runs a MockAlation in a child process, so it does not share the GIL
+    with the client being measured. Returns `(process, base_url)`; call
+    `process.terminate()` when done."""
+    ready = multiprocessing.Queue()
+    process = multiprocessing.Process(target=_serve, args=(config, host, port, ready), daemon=True)
+    process.start()
+    return process, ready.get(timeout=30)
+
+
+def main(argv=None):
+    defaults = MockConfig()
+    parser = argparse.ArgumentParser(description="Run a local mock Alation server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--members", type=int, default=defaults.members, help="Members in every catalog set")
+    parser.add_argument("--latency", type=float, default=defaults.latency, help="Seconds added to every request")
+    parser.add_argument("--jitter", type=float, default=defaults.jitter, help="Latency jitter, as a share")
+    parser.add_argument("--error-rate", type=float, default=defaults.error_rate, help="Share of requests failing 500")
+    parser.add_argument("--throttle-rate", type=float, default=defaults.throttle_rate,
+                        help="Share of requests answered 429")
+    parser.add_argument("--rate-limit", type=float, default=defaults.rate_limit,
+                        help="Requests/sec before answering 429 (0 = unlimited)")
+    parser.add_argument("--retry-after", type=int, default=defaults.retry_after, help="Retry-After sent with 429s")
+    parser.add_argument("--job-duration", type=float, default=defaults.job_duration,
+                        help="Seconds a bulk_metadata job runs")
+    parser.add_argument("--task-duration", type=float, default=defaults.task_duration,
+                        help="Seconds a cold start task runs")
+    parser.add_argument("--no-report-sensitivity", dest="report_sensitivity", action="store_false",
+                        help="Leave is_sensitive out of catalog set members")
+    args = parser.parse_args(argv)
+    config = MockConfig(**{field: getattr(args, field) for field in MockConfig._fields})
+    server = MockAlation(config, args.host, args.port).start()
+    print(f"Mock Alation listening on {server.base_url}")
+    try:
+        server._thread.join()
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
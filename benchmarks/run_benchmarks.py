@@ -0,0 +1,175 @@
+"""Repeatable performance scenarios run against the local mock Alation server.
+
+Each scenario starts a fresh `MockAlation` in a child process, drives one of the CSA helpers
+through it and reports operations/sec plus per-endpoint latency from
+`alation_metrics`. Save a run with --output and pass it as --baseline later
+to see the change in throughput for every scenario.
+
+    python benchmarks/run_benchmarks.py
+    python benchmarks/run_benchmarks.py members-100k sensitivity-10k --scale 0.1 --output before.json
+    python benchmarks/run_benchmarks.py --baseline before.json --latency 0.05 --throttle-rate 0.02
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from collections import namedtuple
+
+# Shared CSA modules (cache, client, ...) live at the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from alation_metrics import get_metrics
+from catalog_set_members import Selection, collect_attributes, iter_catalog_set_members, iter_selected_members
+from catalog_set_sensitivity import bulk_update_sensitivity
+from cold_start import run_cold_starts
+from Documents.Documents_CreateStubDocuments import create_stub_documents_chunked
+from Documents.Documents_RetrieveDocuments import fetch_documents
+from mock_alation import MockConfig, start_in_process
+
+Scenario = namedtuple("Scenario", ["run", "size", "help"])
+
+CATALOG_SET_ID = 1
+TENANT_ID = "123e4567-e89b-12d3-a456-426614174000"
+TOKEN = "benchmark-token"
+
+
+# --- Scenarios: each takes (base_url, size, args) and returns (operations, failures) ---
+
+def bench_members(base_url, size, args):
+    members = iter_catalog_set_members(base_url, TOKEN, CATALOG_SET_ID, args.page_size, args.max_in_flight)
+    _, seen = collect_attributes(members)
+    return seen, size - seen
+
+
+def bench_selected_members(base_url, size, args):
+    # Roughly a ninth of the titles contain "_9"; the rest are never downloaded
+    selection = Selection(search="_9", patterns=("column_9*",))
+    members = iter_selected_members(base_url, TOKEN, CATALOG_SET_ID, selection, args.page_size, args.max_in_flight)
+    store, _ = collect_attributes(members)
+    return len(store), 0
+
+
+def bench_sensitivity(base_url, size, args):
+    failures = bulk_update_sensitivity(base_url, TOKEN, range(1, size + 1), "set", max_workers=args.max_workers)
+    return size, len(failures)
+
+
+def bench_documents(base_url, size, args):
+    results = fetch_documents(base_url, TOKEN, range(1, size + 1), max_workers=args.max_workers,
+                              batch_size=args.batch_size)
+    errors = sum(1 for _, result in results if isinstance(result, dict) and "error" in result)
+    return size, errors
+
+
+def bench_stub_docs(base_url, size, args):
+    summary = create_stub_documents_chunked(base_url, TOKEN, size, 7, 72, 57, [58, 59],
+                                            max_workers=args.max_workers)
+    return summary["docs_created"], size - summary["docs_created"]
+
+
+def bench_cold_starts(base_url, size, args):
+    items = [{"data_product_id": f"dp-{i}", "result_cache_database": "DB", "result_cache_schema": "SCHEMA",
+              "if_exists": "archive"} for i in range(size)]
+    results, summary = run_cold_starts(base_url, TENANT_ID, items, "1", TOKEN, max_concurrency=args.max_workers)
+    return summary["total"], summary["failed"]
+
+
+SCENARIOS = {
+    "members-100k": Scenario(bench_members, 100_000, "Enumerate a 100k-member catalog set"),
+    "select-100k": Scenario(bench_selected_members, 100_000,
+                            "Select attributes of a 100k-member catalog set by server-side search"),
+    "sensitivity-10k": Scenario(bench_sensitivity, 10_000, "Set the sensitivity flag on 10k attributes"),
+    "documents-5k": Scenario(bench_documents, 5_000, "Fetch 5k documents"),
+    "stub-docs-5k": Scenario(bench_stub_docs, 5_000, "Create 5k stub documents in chunks"),
+    "cold-start-50": Scenario(bench_cold_starts, 50, "Cold start 50 data products and wait for their tasks"),
+}
+
+
+def run_scenario(name, args):
+    scenario = SCENARIOS[name]
+    size = max(1, int(scenario.size * args.scale))
+    config = MockConfig(members=size, latency=args.latency, error_rate=args.error_rate,
+                        throttle_rate=args.throttle_rate, rate_limit=args.rate_limit, job_duration=args.job_duration,
+                        task_duration=args.task_duration)
+    server, base_url = start_in_process(config)
+    get_metrics().reset()
+    started = time.monotonic()
+    error = None
+    try:
+        operations, failures = scenario.run(base_url, size, args)
+    except Exception as e:
+        # A scenario that aborts still reports what it managed before failing
+        operations, failures, error = 0, size, f"{type(e).__name__}: {e}"
+    finally:
+        elapsed = time.monotonic() - started
+        server.terminate()
+    metrics = get_metrics().summary()
+    return {
+        "scenario": name,
+        "size": size,
+        "operations": operations,
+        "failures": failures,
+        "error": error,
+        "elapsed_s": round(elapsed, 3),
+        "ops_per_s": round(operations / elapsed, 2) if elapsed else None,
+        "requests": metrics["requests"],
+        "endpoints": [
+            {key: row[key] for key in ("method", "endpoint", "requests", "errors", "retries", "p50_s", "p95_s",
+                                       "p99_s", "limiter_wait_s")}
+            for row in metrics["endpoints"]
+        ],
+    }
+
+
+def print_report(report, baseline=None):
+    change = ""
+    if baseline and baseline.get("ops_per_s") and report["ops_per_s"] is not None:
+        change = f" ({(report['ops_per_s'] / baseline['ops_per_s'] - 1) * 100:+.1f}% vs baseline)"
+    print(f"{report['scenario']}: {report['operations']} ops in {report['elapsed_s']}s = "
+          f"{report['ops_per_s']} ops/s{change}, {report['failures']} failures, {report['requests']} requests")
+    if report["error"]:
+        print(f"    aborted: {report['error']}")
+    for row in report["endpoints"]:
+        print(f"    {row['method']:4} {row['endpoint']:60} n={row['requests']:<7} p50={row['p50_s']}s "
+              f"p95={row['p95_s']}s p99={row['p99_s']}s retries={row['retries']} wait={row['limiter_wait_s']}s")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the CSA utilities against a local mock Alation server")
+    parser.add_argument("scenarios", nargs="*", help=f"Scenarios to run (default: all): {', '.join(SCENARIOS)}")
+    parser.add_argument("--scale", type=float, default=1.0, help="Multiply every scenario's size, e.g. 0.1")
+    parser.add_argument("--latency", type=float, default=0.01, help="Mock server seconds per request")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of requests failing 500")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="Share of requests answered 429")
+    parser.add_argument("--rate-limit", type=float, default=0.0, help="Mock server requests/sec budget")
+    parser.add_argument("--job-duration", type=float, default=1.0, help="Seconds a bulk_metadata job runs")
+    parser.add_argument("--task-duration", type=float, default=2.0, help="Seconds a cold start task runs")
+    parser.add_argument("--max-workers", type=int, default=8, help="Client concurrency")
+    parser.add_argument("--page-size", type=int, default=100, help="Members page size")
+    parser.add_argument("--max-in-flight", type=int, default=4, help="Member pages fetched at once")
+    parser.add_argument("--batch-size", type=int, default=1, help="Document ids per request")
+    parser.add_argument("--output", help="Write the reports as JSON to this file")
+    parser.add_argument("--baseline", help="Earlier --output file to compare throughput against")
+    args = parser.parse_args(argv)
+    unknown = [name for name in args.scenarios if name not in SCENARIOS]
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(unknown)}")
+
+    baseline = {}
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = {report["scenario"]: report for report in json.load(f)}
+    reports = []
+    for name in args.scenarios or SCENARIOS:
+        report = run_scenario(name, args)
+        print_report(report, baseline.get(name))
+        reports.append(report)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(reports, f, indent=2)
+    return 1 if any(report["failures"] for report in reports) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,378 @@
+"""Catalog set member enumeration for Alation.
+
+Reads the server-side total from the first page of
+`/api/v1/catalog_set/{id}/members/` and fetches the remaining pages
+concurrently, yielding members in page order as pages land. Attribute
+members can be streamed straight into an `AttributeStore`, a slim columnar
+projection that is cheap to keep in Streamlit session state.
+
+A `Selection` narrows which attributes are collected: its search term is
+sent to the server, while otype, datasource/schema/table scope and name
+patterns are applied to members as they stream in. Once collected, an
+`AttributeStore` can be narrowed further with `select`, which uses an
+in-memory ds/schema/table index instead of re-downloading the set.
+"""
+import fnmatch
+import re
+from array import array
+from collections import namedtuple
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from alation_client import get_session
+
+DEFAULT_PAGE_SIZE = 100
+DEFAULT_MAX_IN_FLIGHT = 4
+
+# Member payload fields that may carry an attribute's current sensitivity flag
+SENSITIVITY_FIELDS = ("is_sensitive", "sensitive")
+
+# `search` is passed to the members API; everything else is matched client-side.
+# Scopes are datasource/schema/table titles and patterns are case-insensitive
+# globs on the member title, e.g. "*email*".
+Selection = namedtuple(
+    "Selection",
+    ["search", "otypes", "datasources", "schemas", "tables", "patterns"],
+    defaults=["", ("attribute",), (), (), (), ()],
+)
+ALL_ATTRIBUTES = Selection()
+
+
+def fetch_members_page(session, base_url, catalog_set_id, skip, limit=DEFAULT_PAGE_SIZE, timeout=30, cache=None,
+                       search=""):
+    """Fetches one page of members matching `search`. Returns `(batch, server_count)`."""
+    cache_key = f"{catalog_set_id}:{skip}:{limit}:{search}"
+    if cache is not None:
+        cached = cache.get(base_url, "catalog_set_members", cache_key)
+        if cached is not None:
+            return tuple(cached)
+    url = f"{base_url}/api/v1/catalog_set/{catalog_set_id}/members/"
+    params = {
+        "limit": limit,
+        "skip": skip,
+        "enable_server_count": "true",
+        "search": search,
+    }
+    r = session.get(url, params=params, timeout=timeout)
+    r.raise_for_status()
+    count = r.headers.get("X-Total-Count")
+    page = r.json(), int(count) if count and count.isdigit() else None
+    if cache is not None:
+        cache.set(base_url, "catalog_set_members", cache_key, page)
+    return page
+
+
+def iter_member_pages(base_url, api_token, catalog_set_id, page_size=DEFAULT_PAGE_SIZE,
+                      max_in_flight=DEFAULT_MAX_IN_FLIGHT, ordered=True, session=None, cache=None, search=""):
+    """Yields lists of members, one per page, optionally narrowed by a server-side `search`.
+
+    With `ordered=False` pages are yielded as soon as they land, otherwise
+    they are reassembled into server order. Falls back to serial paging
+    when the server does not report a total count. Pages are read from and
+    stored in `cache` (an `alation_cache.MetadataCache`) when given.
+    """
+    session = session or get_session(base_url, api_token)
+    first, total = fetch_members_page(session, base_url, catalog_set_id, 0, page_size, cache=cache, search=search)
+    if not first:
+        return
+    yield first
+
+    if total is None:
+        skip = page_size
+        while True:
+            batch, _ = fetch_members_page(session, base_url, catalog_set_id, skip, page_size, cache=cache,
+                                          search=search)
+            if not batch:
+                return
+            yield batch
+            skip += page_size
+
+    skips = iter(range(page_size, total, page_size))
+    with ThreadPoolExecutor(max_workers=max_in_flight) as pool:
+        pending = {}
+
+        def submit_next():
+            skip = next(skips, None)
+            if skip is not None:
+                pending[skip] = pool.submit(
+                    fetch_members_page, session, base_url, catalog_set_id, skip, page_size, cache=cache,
+                    search=search,
+                )
+
+        for _ in range(max_in_flight):
+            submit_next()
+
+        next_skip = page_size
+        while pending:
+            if ordered:
+                batch, _ = pending.pop(next_skip).result()
+                next_skip += page_size
+                submit_next()
+                yield batch
+                continue
+            done, _ = wait(pending.values(), return_when=FIRST_COMPLETED)
+            for skip in [s for s, f in pending.items() if f in done]:
+                batch, _ = pending.pop(skip).result()
+                submit_next()
+                yield batch
+
+
+def iter_catalog_set_members(base_url, api_token, catalog_set_id, page_size=DEFAULT_PAGE_SIZE,
+                             max_in_flight=DEFAULT_MAX_IN_FLIGHT, ordered=True, session=None, cache=None, search=""):
+    """Yields individual members as their pages land."""
+    pages = iter_member_pages(base_url, api_token, catalog_set_id, page_size, max_in_flight, ordered, session, cache,
+                              search)
+    for batch in pages:
+        yield from batch
+
+
+def compile_patterns(patterns):
+    """Compiles case-insensitive title globs into one regex, or None when there are none."""
+    patterns = [p.strip() for p in patterns if p and p.strip()]
+    if not patterns:
+        return None
+    return re.compile("|".join(fnmatch.translate(p) for p in patterns), re.IGNORECASE)
+
+
+def _title(value):
+    return (value or {}).get("title")
+
+
+def member_filter(selection):
+    """Returns a predicate applying the client-side part of `selection` to raw members."""
+    otypes = set(selection.otypes)
+    scopes = (("ds", set(selection.datasources)), ("schema", set(selection.schemas)),
+              ("table", set(selection.tables)))
+    scopes = [(field, values) for field, values in scopes if values]
+    pattern = compile_patterns(selection.patterns)
+
+    def matches(member):
+        if otypes and member.get("otype") not in otypes:
+            return False
+        for field, values in scopes:
+            if _title(member.get(field)) not in values:
+                return False
+        return pattern is None or bool(pattern.match(member.get("title") or ""))
+
+    return matches
+
+
+def iter_selected_members(base_url, api_token, catalog_set_id, selection=ALL_ATTRIBUTES, page_size=DEFAULT_PAGE_SIZE,
+                          max_in_flight=DEFAULT_MAX_IN_FLIGHT, session=None, cache=None, on_page=None):
+    """Yields the members matching `selection`, filtering each page as it lands.
+
+    `on_page(members_seen)` is called after every page with the running
+    count of members downloaded, matched or not.
+    """
+    matches = member_filter(selection)
+    seen = 0
+    pages = iter_member_pages(base_url, api_token, catalog_set_id, page_size, max_in_flight, session=session,
+                              cache=cache, search=selection.search)
+    for batch in pages:
+        seen += len(batch)
+        if on_page:
+            on_page(seen)
+        yield from filter(matches, batch)
+
+
+def get_all_catalog_set_members(base_url, api_token, catalog_set_id, page_size=DEFAULT_PAGE_SIZE,
+                                max_in_flight=DEFAULT_MAX_IN_FLIGHT, cache=None):
+    """Returns every member of the catalog set, in server order."""
+    return list(iter_catalog_set_members(base_url, api_token, catalog_set_id, page_size, max_in_flight, cache=cache))
+
+
+def member_sensitivity(member):
+    """Returns the member's sensitivity flag, or None if the payload has none."""
+    for field in SENSITIVITY_FIELDS:
+        value = member.get(field)
+        if isinstance(value, bool):
+            return value
+    return None
+
+
+class AttributeStore:
+    """Columnar id/title/table/schema/ds projection of attribute members.
+
+    Ids live in a typed array and repeated table/schema/ds titles are
+    interned, so the store is a fraction of the size of the raw payload.
+    The current sensitivity flag, when the payload carries one, is kept as
+    1/0 in a byte array (-1 when unknown) and kept current by writers
+    through `update_sensitivity`. `scopes()` indexes the rows by
+    (ds, schema, table) so `select` can narrow them without a full scan.
+    """
+
+    COLUMNS = ("id", "title", "table", "schema", "ds", "sensitive")
+
+    def __init__(self):
+        self.ids = array("q")
+        self.sensitive = array("b")
+        self.titles = []
+        self.tables = []
+        self.schemas = []
+        self.datasources = []
+        self._interned = {}
+        self._scopes = None
+        self._positions = None
+        self._frame = None
+
+    def __len__(self):
+        return len(self.ids)
+
+    def _intern(self, value):
+        return self._interned.setdefault(value, value)
+
+    def append(self, member):
+        self.ids.append(member["id"])
+        self.titles.append(member.get("title"))
+        self.tables.append(self._intern((member.get("table") or {}).get("title")))
+        self.schemas.append(self._intern((member.get("schema") or {}).get("title")))
+        self.datasources.append(self._intern((member.get("ds") or {}).get("title")))
+        flag = member_sensitivity(member)
+        self.sensitive.append(-1 if flag is None else int(flag))
+        self._scopes = None
+        self._positions = None
+        self._frame = None
+
+    def scopes(self):
+        """Returns the `{(ds, schema, table): array of row positions}` index, built on first use."""
+        if self._scopes is None:
+            scopes = {}
+            for position, key in enumerate(zip(self.datasources, self.schemas, self.tables)):
+                scopes.setdefault(key, array("q")).append(position)
+            self._scopes = scopes
+        return self._scopes
+
+    def select(self, datasources=(), schemas=(), tables=(), patterns=()):
+        """Returns a new AttributeStore with the rows in scope whose title matches `patterns`.
+
+        Empty arguments do not narrow; rows keep their original order.
+        """
+        pattern = compile_patterns(patterns)
+        positions = []
+        for (ds, schema, table), rows in self.scopes().items():
+            if ((datasources and ds not in datasources) or (schemas and schema not in schemas)
+                    or (tables and table not in tables)):
+                continue
+            if pattern is None:
+                positions.extend(rows)
+            else:
+                positions.extend(p for p in rows if pattern.match(self.titles[p] or ""))
+        subset = AttributeStore()
+        subset._interned = self._interned
+        for p in sorted(positions):
+            subset._copy_row(self, p)
+        return subset
+
+    def _copy_row(self, source, position):
+        self.ids.append(source.ids[position])
+        self.titles.append(source.titles[position])
+        self.tables.append(self._intern(source.tables[position]))
+        self.schemas.append(self._intern(source.schemas[position]))
+        self.datasources.append(self._intern(source.datasources[position]))
+        self.sensitive.append(source.sensitive[position])
+        self._scopes = None
+        self._positions = None
+        self._frame = None
+
+    def merge(self, other, seen_ids):
+        """Appends the rows of `other` whose id is not in `seen_ids`, adding them to it.
+
+        Returns the number of duplicate rows skipped.
+        """
+        duplicates = 0
+        for position, attr_id in enumerate(other.ids):
+            if attr_id in seen_ids:
+                duplicates += 1
+                continue
+            seen_ids.add(attr_id)
+            self._copy_row(other, position)
+        return duplicates
+
+    def update_sensitivity(self, attr_id, flag):
+        """Records a flag written after the store was collected, so later syncs see it.
+
+        Returns False when `attr_id` is not in the store.
+        """
+        if self._positions is None:
+            self._positions = {row_id: position for position, row_id in enumerate(self.ids)}
+        position = self._positions.get(attr_id)
+        if position is None:
+            return False
+        self.sensitive[position] = int(flag)
+        self._frame = None
+        return True
+
+    def sensitivity(self):
+        """Yields True/False/None per attribute, aligned with `ids`."""
+        for flag in self.sensitive:
+            yield None if flag < 0 else bool(flag)
+
+    def columns(self):
+        """Returns a dict of column lists, suitable for `st.dataframe`."""
+        return {
+            "id": list(self.ids),
+            "title": self.titles,
+            "table": self.tables,
+            "schema": self.schemas,
+            "ds": self.datasources,
+            "sensitive": list(self.sensitivity()),
+        }
+
+    def to_frame(self):
+        """Returns the store as a pandas DataFrame, built once and reused until the store changes.
+
+        Ids and flags are converted straight from the typed arrays and
+        table/schema/ds become categoricals, so the frame converts cheaply
+        to Arrow.
+        """
+        if self._frame is None:
+            import numpy as np
+            import pandas as pd
+
+            flags = np.array(self.sensitive, dtype=np.int8)
+            self._frame = pd.DataFrame({
+                "id": np.array(self.ids, dtype=np.int64),
+                "title": pd.Series(self.titles, dtype=object),
+                "table": pd.Categorical(self.tables),
+                "schema": pd.Categorical(self.schemas),
+                "ds": pd.Categorical(self.datasources),
+                "sensitive": pd.arrays.BooleanArray(flags == 1, flags < 0),
+            })
+        return self._frame
+
+    def rows(self):
+        columns = (self.ids, self.titles, self.tables, self.schemas, self.datasources, self.sensitivity())
+        for row in zip(*columns):
+            yield dict(zip(self.COLUMNS, row))
+
+
+def scope_choices(scopes, datasources=(), schemas=()):
+    """Returns the sorted `(datasources, schemas, tables)` on offer, each narrowed by the levels above it."""
+    keys = list(scopes)
+    ds_options = sorted({ds for ds, _, _ in keys if ds is not None})
+    if datasources:
+        keys = [key for key in keys if key[0] in datasources]
+    schema_options = sorted({schema for _, schema, _ in keys if schema is not None})
+    if schemas:
+        keys = [key for key in keys if key[1] in schemas]
+    table_options = sorted({table for _, _, table in keys if table is not None})
+    return ds_options, schema_options, table_options
+
+
+def collect_attributes(members, store=None):
+    """Streams members into an AttributeStore, keeping only attributes.
+
+    Returns `(store, members_seen)`; non-attribute members are counted and
+    dropped without being retained.
+    """
+    store = store if store is not None else AttributeStore()
+    seen = 0
+    for member in members:
+        seen += 1
+        if member.get("otype") == "attribute":
+            store.append(member)
+    return store, seen
+
+
+def invalidate_catalog_set(cache, base_url, catalog_set_id):
+    """Drops every cached members page of the catalog set."""
+    cache.invalidate_prefix(base_url, "catalog_set_members", f"{catalog_set_id}:")
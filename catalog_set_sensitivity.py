@@ -0,0 +1,165 @@
+"""Bulk sensitivity flag writer for Alation attributes.
+
+Runs the `/ajax/set_attr_sensitivity/{id}/` POSTs over a shared keep-alive
+session with a bounded worker pool, paced by the shared adaptive rate
+limiter. Usable from the Streamlit PoC or as a plain import:
+
+    from catalog_set_sensitivity import bulk_update_sensitivity
+    failures = bulk_update_sensitivity(base_url, api_token, attr_ids, "set")
+
+`plan_sensitivity_sync` computes which attributes actually need a write,
+so re-applying a policy only touches the attributes that changed.
+`resolve_sensitivity_states` gives the state each attribute is in before
+a run, which `sensitivity_snapshot` records so the run can be reverted.
+`remember_sensitivity_states` keeps the flags a sync found correct
+trusted for another `state_max_age`, so regular syncs do not re-write
+attributes just because their last write has aged out.
+"""
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import requests
+
+from alation_client import RETRY_STATUSES, get_session, retry_delay
+from alation_metrics import get_metrics
+from alation_ratelimit import THROTTLE_STATUSES
+
+SENSITIVITY_ACTIONS = {
+    "set": "mark_sensitive",
+    "unset": "mark_unsensitive",
+}
+DEFAULT_MAX_WORKERS = 8
+# How long a flag this tool wrote is trusted when the server payload has none; flags are
+# kept at most alation_cache.PINNED_MAX_AGE, so longer ages behave like that one
+DEFAULT_STATE_MAX_AGE = 24 * 60 * 60
+
+WriteResult = namedtuple("WriteResult", ["attr_id", "action", "ok", "status_code", "error"])
+SyncPlan = namedtuple("SyncPlan", ["action", "to_write", "unchanged", "unknown"])
+
+
+def post_sensitivity(session, base_url, attr_id, action, max_attempts=5, timeout=30):
+    """POSTs one sensitivity action, retrying 429/5xx responses.
+
+    Pacing after 429/503 is left to the session's shared rate limiter;
+    other 5xx responses are retried after a short jittered delay.
+    """
+    url = f"{base_url}/ajax/set_attr_sensitivity/{attr_id}/"
+    for attempt in range(1, max_attempts + 1):
+        resp = session.post(url, data={"action": SENSITIVITY_ACTIONS[action]}, timeout=timeout)
+        if resp.status_code in RETRY_STATUSES and attempt < max_attempts:
+            get_metrics().record_retry("POST", url)
+            if resp.status_code not in THROTTLE_STATUSES:
+                time.sleep(retry_delay(attempt, cap=30.0))
+            continue
+        resp.raise_for_status()
+        return resp
+
+
+def iter_sensitivity_updates(base_url, api_token, attr_ids, action, max_workers=DEFAULT_MAX_WORKERS, session=None,
+                             cache=None, on_late_result=None):
+    """Yields a WriteResult per attribute as each concurrent POST completes.
+
+    Results are yielded in the caller's thread, so Streamlit widgets can be
+    updated from the loop body. Each written flag is remembered in `cache`
+    as "attribute_sensitivity" for later syncs, and once any write succeeds
+    every cached catalog set members page of `base_url` is dropped, since
+    those pages carry the old flags. When the caller
+    stops early, writes already in flight still complete; each of their
+    results is passed to `on_late_result(result)` instead of being yielded.
+    """
+    if action not in SENSITIVITY_ACTIONS:
+        raise ValueError(f"Unknown sensitivity action: {action!r}")
+    session = session or get_session(base_url, api_token)
+
+    def write(attr_id):
+        try:
+            resp = post_sensitivity(session, base_url, attr_id, action)
+            wrote.set()
+            if cache is not None:
+                cache.set(base_url, "attribute_sensitivity", attr_id, action == "set")
+            return WriteResult(attr_id, action, True, resp.status_code, None)
+        except requests.exceptions.HTTPError as e:
+            return WriteResult(attr_id, action, False, e.response.status_code, str(e))
+        except requests.exceptions.RequestException as e:
+            return WriteResult(attr_id, action, False, None, str(e))
+
+    wrote = threading.Event()
+    pool = ThreadPoolExecutor(max_workers=max_workers)
+    futures = []
+    yielded = set()
+    try:
+        futures = [pool.submit(write, attr_id) for attr_id in attr_ids]
+        for future in as_completed(futures):
+            yielded.add(future)
+            yield future.result()
+    finally:
+        # Abandoning the generator stops writes that have not started yet; those in flight still land
+        pool.shutdown(wait=True, cancel_futures=True)
+        if on_late_result:
+            for future in futures:
+                if future not in yielded and not future.cancelled():
+                    on_late_result(future.result())
+        if cache is not None and wrote.is_set():
+            cache.invalidate(base_url, "catalog_set_members")
+
+
+def bulk_update_sensitivity(base_url, api_token, attr_ids, action, max_workers=DEFAULT_MAX_WORKERS, on_result=None,
+                            cache=None):
+    """Applies `action` ("set" or "unset") to every attribute id.
+
+    `on_result(done, total, result)` is called after each write. Returns the
+    list of `(attr_id, error)` failures.
+    """
+    attr_ids = list(attr_ids)
+    failures = []
+    results = iter_sensitivity_updates(base_url, api_token, attr_ids, action, max_workers, cache=cache)
+    for done, result in enumerate(results, start=1):
+        if not result.ok:
+            failures.append((result.attr_id, result.error))
+        if on_result:
+            on_result(done, len(attr_ids), result)
+    return failures
+
+
+def resolve_sensitivity_states(base_url, attr_ids, current_states, cache=None, state_max_age=DEFAULT_STATE_MAX_AGE):
+    """Returns `{attr_id: True/False/None}` for attributes whose server-reported state is `current_states`.
+
+    `current_states` is aligned with `attr_ids`. Where the server reported
+    nothing, the flag last written by this tool (if younger than
+    `state_max_age`) is used; otherwise the state stays None.
+    """
+    states = dict(zip(attr_ids, current_states))
+    unresolved = [attr_id for attr_id, state in states.items() if state is None]
+    if cache is not None and unresolved:
+        remembered = cache.get_many(base_url, "attribute_sensitivity", unresolved, max_age=state_max_age)
+        for attr_id in unresolved:
+            states[attr_id] = remembered.get(str(attr_id))
+    return states
+
+
+def remember_sensitivity_states(base_url, states, cache):
+    """Records every known state of `{attr_id: True/False/None}` as "attribute_sensitivity" in `cache`."""
+    if cache is not None:
+        cache.set_many(base_url, "attribute_sensitivity",
+                       {attr_id: state for attr_id, state in states.items() if state is not None})
+
+
+def plan_sensitivity_sync(base_url, attr_ids, current_states, action, cache=None,
+                          state_max_age=DEFAULT_STATE_MAX_AGE, states=None):
+    """Works out which attributes need `action` to reach the desired state.
+
+    States are resolved as in `resolve_sensitivity_states`, unless already
+    resolved `states` are given. Attributes whose state is still unknown
+    are written to be safe.
+    """
+    if action not in SENSITIVITY_ACTIONS:
+        raise ValueError(f"Unknown sensitivity action: {action!r}")
+    desired = action == "set"
+    if states is None:
+        states = resolve_sensitivity_states(base_url, attr_ids, current_states, cache, state_max_age)
+
+    to_write = [attr_id for attr_id, state in states.items() if state != desired]
+    unknown = sum(1 for attr_id in to_write if states[attr_id] is None)
+    return SyncPlan(action, to_write, len(states) - len(to_write), unknown)
@@ -1,6 +1,32 @@
-import requests
+from functools import partial
+
+import pandas as pd
 import streamlit as st
 
+from alation_cache import PINNED_MAX_AGE, get_default_cache
+from catalog_set_members import (
+    DEFAULT_MAX_IN_FLIGHT,
+    DEFAULT_PAGE_SIZE,
+    Selection,
+    scope_choices,
+)
+from catalog_set_sensitivity import (
+    DEFAULT_MAX_WORKERS,
+    DEFAULT_STATE_MAX_AGE,
+    plan_sensitivity_sync,
+    remember_sensitivity_states,
+    resolve_sensitivity_states,
+)
+from sensitivity_job import (
+    DEFAULT_MAX_SETS,
+    collect_catalog_sets,
+    iter_journaled_updates,
+    open_journal,
+    parse_catalog_set_ids,
+)
+from sensitivity_snapshot import SnapshotRecorder, find_snapshot, list_snapshots, revert_snapshot
+from streamlit_render import cached_session, render_jobs, render_live_metrics, render_table, submit_job
+
 # =========================
 # STREAMLIT UI
 # =========================
@@ -8,134 +34,232 @@ st.title("Catalog Set Sensitivity Flag PoC")
 
 base_url = st.text_input("Alation Base URL", "https://your-instance.alationcloud.com")
 api_token = st.text_input("API Token", type="password")
-catalog_set_id = st.text_input("Catalog Set ID")
+catalog_set_id = st.text_input("Catalog Set ID(s)", help="Several ids separated by commas are processed together, "
+                               "writing attributes shared between sets once")
+search = st.text_input("Server-side Search (optional)", help="Only members matching this term are downloaded")
+max_workers = st.number_input("Max Concurrent Requests", value=DEFAULT_MAX_WORKERS, min_value=1, max_value=64)
+page_size = st.number_input("Members Page Size", value=DEFAULT_PAGE_SIZE, min_value=1, max_value=1000)
+max_in_flight = st.number_input("Max Pages In Flight", value=DEFAULT_MAX_IN_FLIGHT, min_value=1, max_value=32)
+max_sets = st.number_input("Catalog Sets Retrieved at Once", value=DEFAULT_MAX_SETS, min_value=1, max_value=16)
+use_cache = st.checkbox("Use local metadata cache", value=True)
+resume_runs = st.checkbox("Resume interrupted runs from checkpoint", value=True)
+state_max_age_hours = st.number_input("Trust Flags Written Within (hours)", value=DEFAULT_STATE_MAX_AGE / 3600,
+                                      min_value=0.0, max_value=PINNED_MAX_AGE / 3600,
+                                      help="Used where the server does not report an attribute's sensitivity")
 
 if "attributes" not in st.session_state:
-    st.session_state["attributes"] = []
+    st.session_state["attributes"] = None
 
 if not (base_url and api_token and catalog_set_id):
+    with st.expander("📈 API Metrics"):
+        render_live_metrics()
     st.stop()
 
-headers = {
-    "Token": api_token,
-    "accept": "application/json",
-}
+cache = get_default_cache() if use_cache else None
+session = cached_session(base_url, api_token)
+catalog_set_ids = parse_catalog_set_ids(catalog_set_id)
 
 # =========================
 # API FUNCTIONS
 # =========================
-def get_all_catalog_set_members():
-    all_members = []
-    limit = 100
-    skip = 0
-
-    while True:
-        url = f"{base_url}/api/v1/catalog_set/{catalog_set_id}/members/"
-        params = {
-            "limit": limit,
-            "skip": skip,
-            "enable_server_count": "true",
-            "search": "",
-        }
-
-        r = requests.get(url, headers=headers, params=params, timeout=30)
-        r.raise_for_status()
-
-        batch = r.json()
-        if not batch:
+def plan_sync(attributes, action):
+    return plan_sensitivity_sync(base_url, attributes.ids, attributes.sensitivity(), action, cache=cache,
+                                 state_max_age=state_max_age_hours * 3600)
+
+
+def record_write(stores, result):
+    """Keeps the retrieved stores in step with a write, so the next sync and snapshot start from the real state."""
+    if result.ok:
+        for store in stores:
+            store.update_sensitivity(result.attr_id, result.action == "set")
+
+
+def run_sensitivity_update(job, base_url, api_token, catalog_set_ids, attributes, action, sync, resume, max_workers,
+                           cache, session, stores, state_max_age):
+    """Background job body: writes `action` to the attributes and returns the `(attr_id, error)` failures.
+
+    `stores` are the AttributeStores in session state, updated as writes land.
+    """
+    ids = attributes.ids
+    states = resolve_sensitivity_states(base_url, ids, attributes.sensitivity(), cache, state_max_age)
+    notes = []
+    if sync:
+        plan = plan_sensitivity_sync(base_url, ids, None, action, states=states)
+        ids = plan.to_write
+        to_write = set(ids)
+        remember_sensitivity_states(base_url, {a: s for a, s in states.items() if a not in to_write}, cache)
+        notes.append(f"Sync: {len(ids)} attributes need a write, {plan.unchanged} already correct.")
+    journal = open_journal(base_url, ",".join(catalog_set_ids), action, fresh=not resume,
+                           log=lambda note: notes.append(f"{note}."))
+    ids = journal.pending(ids)
+    job.update(0, len(ids), " ".join(notes))
+    failures = []
+    snapshot = SnapshotRecorder(base_url, catalog_set_ids, action, states)
+    results = iter_journaled_updates(
+        journal, base_url, api_token, ids, action, max_workers=max_workers, cache=cache, session=session,
+        snapshot=snapshot, on_late_result=partial(record_write, stores),
+    )
+    for i, result in enumerate(results, start=1):
+        record_write(stores, result)
+        if not result.ok:
+            failures.append((result.attr_id, result.error))
+        job.update(i, message=f"{i} of {len(ids)} written")
+        if job.is_cancelled():
+            # Closing the generator stops queued writes and keeps the checkpoint for a later resume
+            results.close()
+            job.update(message=f"Cancelled after {i} of {len(ids)} writes; run again to resume.")
             break
+    if snapshot.saved:
+        job.update(message=f"{job.message.rstrip('.')}. Snapshot {snapshot.saved}: {len(snapshot.changed)} "
+                           f"attributes changed, {len(snapshot.unknown)} with unknown prior state.")
+    return failures
 
-        all_members.extend(batch)
-        skip += limit
 
-    return all_members
+def run_revert(job, run_id, api_token, include_unknown, max_workers, cache, session, stores):
+    """Background job body: restores the flags a run changed and returns the `(attr_id, error)` failures."""
+    def on_result(done, total, result):
+        record_write(stores, result)
+        job.update(done, total, f"{done} of {total} reverted")
 
+    summary = revert_snapshot(find_snapshot(run_id), api_token, max_workers, include_unknown, cache=cache,
+                              session=session, on_result=on_result, should_stop=job.is_cancelled)
+    skipped = f", {summary['skipped_unknown']} with unknown prior state skipped" if summary["skipped_unknown"] else ""
+    job.update(message=f"{summary['written']} of {summary['attributes']} attributes reverted{skipped}.")
+    return summary["failures"]
 
-def set_sensitive(attr_id):
-    url = f"{base_url}/ajax/set_attr_sensitivity/{attr_id}/"
-    write_headers = {
-        "Token": api_token,
-        "Connection": "close",
-        "accept": "application/json",
-    }
-    return requests.post(url, headers=write_headers, data={"action": "mark_sensitive"}, timeout=30)
 
-def unset_sensitive(attr_id):
-    url = f"{base_url}/ajax/set_attr_sensitivity/{attr_id}/"
-    write_headers = {
-        "Token": api_token,
-        "Connection": "close",
-        "accept": "application/json",
-    }
-    return requests.post(url, headers=write_headers, data={"action": "mark_unsensitive"}, timeout=30)
+def describe_snapshot(meta):
+    reverted = " · reverted" if meta["reverted_by"] else ""
+    undo = f" · undoes {meta['reverts']}" if meta["reverts"] else ""
+    return (f"{meta['run_id']} · {meta['action']} on sets {', '.join(meta['catalog_set_ids'])} · "
+            f"{meta['changed']} changed, {meta['unknown']} unknown{undo}{reverted}")
+
+
+def session_stores(attributes=None):
+    """Returns the distinct AttributeStores held in session state (and `attributes`)."""
+    stores = [st.session_state.get("attributes"), (st.session_state.get("selection") or (None, None))[1], attributes]
+    return list({id(store): store for store in stores if store is not None}.values())
+
+
+def start_sensitivity_update(attributes, action, sync=False):
+    verb = "Set" if action == "set" else "Unset"
+    label = f"{verb} sensitivity on {len(attributes)} attributes (catalog sets {', '.join(catalog_set_ids)})"
+    work = partial(run_sensitivity_update, base_url=base_url, api_token=api_token, catalog_set_ids=catalog_set_ids,
+                   attributes=attributes, action=action, sync=sync, resume=resume_runs,
+                   max_workers=int(max_workers), cache=cache, session=session, stores=session_stores(attributes),
+                   state_max_age=state_max_age_hours * 3600)
+    try:
+        # One writer per catalog set selection, since set and unset share its checkpoint journals
+        submit_job("sensitivity", label, work, key=(base_url, ",".join(catalog_set_ids)))
+    except ValueError as e:
+        st.warning(str(e))
+
+
+def show_sensitivity_job(job):
+    failures = job.result
+    if failures:
+        st.error(f"{len(failures)} attributes failed.")
+        render_table(pd.DataFrame(failures, columns=["attr_id", "error"]), key=f"failures_{job.id}")
+    elif job.status == "succeeded":
+        st.success("Every attribute was written.")
 
 # =========================
 # MAIN FLOW
 # =========================
 if st.button("Retrieve Catalog Set Members"):
     with st.spinner("Retrieving catalog set members..."):
-        members = get_all_catalog_set_members()
+        attributes, members_seen, duplicates = collect_catalog_sets(
+            base_url, api_token, catalog_set_ids, Selection(search=search.strip()), page_size=int(page_size),
+            max_in_flight=int(max_in_flight), max_sets=int(max_sets), cache=cache, session=session,
+        )
 
-    attributes = [m for m in members if m.get("otype") == "attribute"]
     st.session_state["attributes"] = attributes
+    st.session_state["selection"] = None
 
-    st.write(f"Total members returned: {len(members)}")
+    st.write(f"Total members returned: {members_seen}")
+    if duplicates:
+        st.write(f"Attributes in more than one catalog set (written once): {duplicates}")
     st.write(f"Attributes eligible for sensitivity: {len(attributes)}")
+    if cache is not None:
+        stats = cache.stats()
+        st.caption(f"Cache hit rate: {stats['hit_rate']:.0%} ({stats['hits']} hits, {stats['misses']} misses)")
 
-    if attributes:
-        st.dataframe(
-            [
-                {
-                    "id": a["id"],
-                    "title": a.get("title"),
-                    "table": a.get("table", {}).get("title"),
-                    "schema": a.get("schema", {}).get("title"),
-                    "ds": a.get("ds", {}).get("title"),
-                }
-                for a in attributes
-            ]
-        )
-    else:
+    if not attributes:
         st.warning("No attributes found in this catalog set.")
 
+# =========================
+# SELECTION
+# =========================
+attributes = st.session_state.get("attributes")
+if attributes:
+    st.subheader("Narrow Selection")
+    scopes = attributes.scopes()
+    ds_options, _, _ = scope_choices(scopes)
+    datasources = st.multiselect("Data Sources", ds_options)
+    _, schema_options, _ = scope_choices(scopes, datasources)
+    schemas = st.multiselect("Schemas", schema_options)
+    _, _, table_options = scope_choices(scopes, datasources, schemas)
+    tables = st.multiselect("Tables", table_options)
+    patterns = st.text_input("Attribute Name Patterns", placeholder="*email*, ssn*",
+                             help="Comma-separated, case-insensitive globs")
+    # The narrowed store is kept across reruns until the selection changes, so its frame is built once
+    selection_key = (tuple(datasources), tuple(schemas), tuple(tables), patterns)
+    selection = st.session_state.get("selection")
+    if selection is None or selection[0] != selection_key:
+        selection = (selection_key, attributes.select(datasources, schemas, tables, patterns.split(",")))
+        st.session_state["selection"] = selection
+    attributes = selection[1]
+    st.write(f"Selected {len(attributes)} of {len(st.session_state['attributes'])} attributes")
+    render_table(attributes.to_frame(), key="attributes")
+
 # =========================
 # ACTION BUTTONS
 # =========================
-attributes = st.session_state.get("attributes", [])
 if attributes:
-    total = len(attributes)
+    sync_mode = st.checkbox("Sync mode: only write attributes not already in the desired state", value=True)
+    if sync_mode and st.button("Preview Sync (dry run)"):
+        for action, label in (("set", "Set"), ("unset", "Unset")):
+            plan = plan_sync(attributes, action)
+            st.write(
+                f"**{label}:** {len(plan.to_write)} writes needed "
+                f"({plan.unknown} with unknown current state), {plan.unchanged} already correct"
+            )
+
     col1, col2 = st.columns(2)
 
     with col1:
         if st.button("Set Sensitivity Flag"):
-            progress = st.progress(0)
-            failures = []
-            for i, a in enumerate(attributes, start=1):
-                try:
-                    resp = set_sensitive(a["id"])
-                    resp.raise_for_status()
-                except Exception as e:
-                    failures.append((a["id"], str(e)))
-                progress.progress(int(i * 100 / total))
-            if failures:
-                st.error(f"Set completed with {len(failures)} failures. See logs.")
-                st.write(failures)
-            else:
-                st.success("Sensitivity flag set for all attributes.")
+            start_sensitivity_update(attributes, "set", sync=sync_mode)
 
     with col2:
-        if st.button("Unset Sensitivity Flag"):
-            progress = st.progress(0)
-            failures = []
-            for i, a in enumerate(attributes, start=1):
-                try:
-                    resp = unset_sensitive(a["id"])
-                    resp.raise_for_status()
-                except Exception as e:
-                    failures.append((a["id"], str(e)))
-                progress.progress(int(i * 100 / total))
-            if failures:
-                st.error(f"Unset completed with {len(failures)} failures. See logs.")
-                st.write(failures)
-            else:
-                st.success("Sensitivity flag unset for all attributes.")
+        if st.button("Unset Sensitivity Flag",
+                     help="Unsets every selected attribute. To undo a Set run, revert its snapshot instead."):
+            start_sensitivity_update(attributes, "unset", sync=sync_mode)
+
+# =========================
+# REVERT
+# =========================
+# Each run keeps a snapshot of the attributes it changed; reverting re-writes only those
+snapshots = {meta["run_id"]: meta for meta in list_snapshots(base_url)}
+if snapshots:
+    st.subheader("Revert a Run")
+    run_id = st.selectbox("Run", list(snapshots), format_func=lambda run_id: describe_snapshot(snapshots[run_id]))
+    include_unknown = st.checkbox("Also revert attributes whose state before the run was unknown", value=False)
+    if st.button("↩️ Revert Run"):
+        meta = snapshots[run_id]
+        work = partial(run_revert, run_id=run_id, api_token=api_token, include_unknown=include_unknown,
+                       max_workers=int(max_workers), cache=cache, session=session, stores=session_stores())
+        try:
+            submit_job("sensitivity", f"Revert {run_id}", work, key=(base_url, ",".join(meta["catalog_set_ids"])))
+        except ValueError as e:
+            st.warning(str(e))
+
+# =========================
+# BACKGROUND JOBS
+# =========================
+# Writes run in the background, so the page stays usable and several selections can be written at once
+st.subheader("Sensitivity Jobs")
+render_jobs("sensitivity", show_sensitivity_job)
+
+with st.expander("📈 API Metrics"):
+    render_live_metrics()
@@ -0,0 +1,276 @@
+"""Cold start API helpers for Chat with Data Products.
+
+Shared by `streamlit_chat_coldstart.py` and the `csa_cli.py cold-start`
+command.
+"""
+import requests
+import shlex
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+
+from alation_client import get_session
+from alation_metrics import get_metrics, percentile
+from alation_poller import BackoffPolicy, watch_tasks
+from alation_ratelimit import THROTTLE_STATUSES
+
+TERMINAL_STATUSES = ["SUCCESS", "FAILURE", "CANCELLED", "ERROR"]
+POLLING_INTERVAL = 5 # seconds, initial interval between status checks
+POLLING_POLICY = BackoffPolicy(initial=POLLING_INTERVAL, maximum=60.0, multiplier=1.5, jitter=0.2)
+IF_EXISTS_OPTIONS = ["error", "archive", "delete"]
+DEFAULT_MAX_CONCURRENCY = 4
+# A cold start POST is not idempotent: it is only retried when the server refused it outright, since a
+# 502/504 may come back after the cold start was created, and a repeat would start a second one
+RETRY_STATUSES = THROTTLE_STATUSES
+MAX_SUBMIT_ATTEMPTS = 5
+
+ColdStartResult = namedtuple("ColdStartResult", ["item", "task_id", "status", "duration_s", "error"])
+
+
+def generate_curl_command(base_url, tenant_id, data_product_id, db, schema, if_exists, user_id, api_key):
+    """Generates the cURL command string from user inputs."""
+    # Clean inputs by stripping whitespace
+    base_url = base_url.strip()
+    tenant_id = tenant_id.strip()
+    data_product_id = data_product_id.strip()
+    db = db.strip()
+    schema = schema.strip()
+    user_id = user_id.strip()
+    api_key = api_key.strip()
+    
+    url = (
+        f"{base_url}/nsapi/api/v3/orgs/{tenant_id}/data_product/cold_start_from_data_product_id"
+        f"?data_product_id={data_product_id}"
+        f"&result_cache_database={db}"
+        f"&result_cache_schema={schema}"
+        f"&if_exists={if_exists}"
+    )
+    
+    command_parts = [
+        'curl', '-X', 'POST', shlex.quote(url),
+        '-H', 'accept: application/json',
+        '-H', f'alation-user-id: {shlex.quote(user_id)}',
+        '-H', f'Authorization: AlationAPIKey {shlex.quote(api_key)}'
+    ]
+    return ' '.join(command_parts)
+
+def execute_api_call(base_url, tenant_id, data_product_id, db, schema, if_exists, user_id, api_key):
+    """Executes the initial Cold Start API call."""
+    base_url = base_url.strip()
+    tenant_id = tenant_id.strip()
+    
+    url = f"{base_url}/nsapi/api/v3/orgs/{tenant_id}/data_product/cold_start_from_data_product_id"
+    headers = {
+        'accept': 'application/json',
+        'alation-user-id': user_id.strip(),
+        'Authorization': f'AlationAPIKey {api_key.strip()}'
+    }
+    params = {
+        'data_product_id': data_product_id.strip(),
+        'result_cache_database': db.strip(),
+        'result_cache_schema': schema.strip(),
+        'if_exists': if_exists
+    }
+    
+    try:
+        response = get_session(base_url).post(url, headers=headers, params=params, timeout=30)
+        response.raise_for_status()
+        return True, response, None
+    except requests.exceptions.HTTPError as e:
+        error_details = {"status_code": e.response.status_code, "reason": e.response.reason, "url": e.request.url}
+        try:
+            error_details["body"] = e.response.json()
+        except ValueError:
+            error_details["body"] = e.response.text
+        return False, None, error_details
+    except requests.exceptions.RequestException as e:
+        return False, None, {"error_type": "Network Error", "message": str(e)}
+
+def check_task_status(base_url, tenant_id, task_id, user_id, api_key):
+    """Checks the status of a given task ID."""
+    base_url = base_url.strip()
+    tenant_id = tenant_id.strip()
+    task_id = task_id.strip()
+
+    # Note: Using the v1 tasks endpoint as per the user's example
+    url = f"{base_url}/nsapi/api/v1/accounts/{tenant_id}/tasks/{task_id}"
+    headers = {
+        'accept': 'application/json',
+        'alation-user-id': user_id.strip(),
+        # Assuming the same authorization method is needed for the tasks endpoint
+        'Authorization': f'AlationAPIKey {api_key.strip()}'
+    }
+
+    try:
+        response = get_session(base_url).get(url, headers=headers, timeout=30)
+        response.raise_for_status()
+        return True, response.json(), None
+    except requests.exceptions.HTTPError as e:
+        error_details = {"status_code": e.response.status_code, "reason": e.response.reason, "url": e.request.url}
+        try:
+            error_details["body"] = e.response.json()
+        except ValueError:
+            error_details["body"] = e.response.text
+        return False, None, error_details
+    except requests.exceptions.RequestException as e:
+        return False, None, {"error_type": "Network Error", "message": str(e)}
+
+def task_is_done(task_data):
+    return task_data.get("status", "UNKNOWN") in TERMINAL_STATUSES
+
+def task_interval_hint(task_data):
+    """Polls long-running tasks less often: a tenth of their running time so far."""
+    if task_data.get("duration_ms"):
+        return task_data["duration_ms"] / 1000 / 10
+    return None
+
+def wait_for_tasks(base_url, tenant_id, task_ids, user_id, api_key, on_update=None, on_done=None,
+                   policy=POLLING_POLICY, should_stop=None):
+    """Watches many tasks concurrently until each reaches a terminal status.
+
+    `on_update(task_id, task_data)` is called after every successful poll
+    and `on_done(result)` once per task. Watching ends early once
+    `should_stop()` is true. Returns `{task_id: PollResult}`.
+    """
+    def fetch_status(task_id):
+        return check_task_status(base_url, tenant_id, task_id, user_id, api_key)
+
+    return watch_tasks(task_ids, fetch_status, task_is_done, on_update=on_update, on_done=on_done, policy=policy,
+                       interval_hint=task_interval_hint, should_stop=should_stop)
+
+def wait_for_task(base_url, tenant_id, task_id, user_id, api_key, on_status=None, policy=POLLING_POLICY):
+    """Polls one task until it reaches a terminal status.
+
+    `on_status(task_data)` is called after every successful poll. Returns
+    `(success, task_data, error_details)` like `check_task_status`.
+    """
+    on_update = (lambda _, task_data: on_status(task_data)) if on_status else None
+    result = wait_for_tasks(base_url, tenant_id, [task_id], user_id, api_key, on_update=on_update,
+                            policy=policy)[task_id]
+    return result.ok, result.data, result.error
+
+def parse_cold_start_items(text, db="", schema="", if_exists="error"):
+    """Parses one item per line: `data_product_id[,result_cache_database,result_cache_schema,if_exists]`.
+
+    Omitted columns fall back to the given defaults. Raises ValueError for
+    an `if_exists` outside IF_EXISTS_OPTIONS.
+    """
+    items = []
+    for line_number, line in enumerate(text.splitlines(), start=1):
+        parts = [part.strip() for part in line.split(",")]
+        if not parts[0] or parts[0].startswith("#"):
+            continue
+        parts += [""] * (4 - len(parts))
+        if (parts[3] or if_exists) not in IF_EXISTS_OPTIONS:
+            raise ValueError(f"Line {line_number}: if_exists must be one of {', '.join(IF_EXISTS_OPTIONS)}, "
+                             f"got {parts[3] or if_exists!r}")
+        items.append({
+            "data_product_id": parts[0],
+            "result_cache_database": parts[1] or db,
+            "result_cache_schema": parts[2] or schema,
+            "if_exists": parts[3] or if_exists,
+        })
+    return items
+
+def submit_cold_start(base_url, tenant_id, item, user_id, api_key):
+    """Submits one cold start, retrying when the server is rate limiting.
+
+    The wait before a retry is left to the session's shared rate limiter,
+    which pauses for the server's Retry-After.
+    """
+    for attempt in range(1, MAX_SUBMIT_ATTEMPTS + 1):
+        success, response, error_details = execute_api_call(
+            base_url, tenant_id, item["data_product_id"], item["result_cache_database"],
+            item["result_cache_schema"], item.get("if_exists", "error"), user_id, api_key,
+        )
+        if success or error_details.get("status_code") not in RETRY_STATUSES or attempt == MAX_SUBMIT_ATTEMPTS:
+            return success, response, error_details
+        get_metrics().record_retry("POST", error_details["url"])
+
+def task_duration_seconds(task_data):
+    """Returns the task's duration from `duration_ms`, or from its timestamps."""
+    if task_data.get("duration_ms"):
+        return task_data["duration_ms"] / 1000
+    if task_data.get("created_at") and task_data.get("completed_at"):
+        created = datetime.fromisoformat(task_data["created_at"].replace("Z", "+00:00"))
+        completed = datetime.fromisoformat(task_data["completed_at"].replace("Z", "+00:00"))
+        return (completed - created).total_seconds()
+    return None
+
+def run_cold_starts(base_url, tenant_id, items, user_id, api_key, max_concurrency=DEFAULT_MAX_CONCURRENCY,
+                    on_submit=None, on_update=None, on_done=None, policy=POLLING_POLICY, should_stop=None, wait=True):
+    """Cold starts many data products and tracks every task to completion.
+
+    At most `max_concurrency` submissions are in flight at once; every task
+    is then watched by one shared poller. Callbacks run in the caller's
+    thread: `on_submit(item, task_id, error_details)` after each
+    submission, `on_update(item, task_data)` after each poll and
+    `on_done(result)` with a ColdStartResult per item. Once `should_stop()`
+    is true no further items are submitted and polling ends; submissions
+    already in flight finish as SUBMITTED (or SUBMIT_FAILED). With
+    `wait=False` tasks are not polled and finish as SUBMITTED. Returns
+    `(results, summary)`.
+    """
+    started = time.monotonic()
+    results = []
+    by_task = {}
+
+    def finish(result):
+        results.append(result)
+        if on_done:
+            on_done(result)
+
+    def submitted(future, watch):
+        item = futures[future]
+        success, response, error_details = future.result()
+        task_id = response.json().get("id") if success else None
+        if on_submit:
+            on_submit(item, task_id, error_details)
+        if task_id and watch:
+            by_task[task_id] = item
+        elif success:
+            finish(ColdStartResult(item, task_id, "SUBMITTED", None, None))
+        else:
+            finish(ColdStartResult(item, None, "SUBMIT_FAILED", None, error_details))
+
+    handled = set()
+    with ThreadPoolExecutor(max_workers=max_concurrency) as pool:
+        futures = {pool.submit(submit_cold_start, base_url, tenant_id, item, user_id, api_key): item for item in items}
+        for future in as_completed(futures):
+            handled.add(future)
+            submitted(future, wait)
+            if should_stop and should_stop():
+                pool.shutdown(wait=False, cancel_futures=True)
+                break
+    # Submissions in flight when the run stopped have landed by now; their tasks are reported, not watched
+    for future in futures:
+        if future not in handled and not future.cancelled():
+            submitted(future, False)
+
+    def task_done(poll_result):
+        item = by_task[poll_result.key]
+        if not poll_result.ok:
+            finish(ColdStartResult(item, poll_result.key, "UNKNOWN", None, poll_result.error))
+            return
+        task_data = poll_result.data
+        finish(ColdStartResult(item, poll_result.key, task_data.get("status"), task_duration_seconds(task_data), None))
+
+    task_update = (lambda task_id, task_data: on_update(by_task[task_id], task_data)) if on_update else None
+    wait_for_tasks(base_url, tenant_id, by_task, user_id, api_key, on_update=task_update, on_done=task_done,
+                   policy=policy, should_stop=should_stop)
+    return results, summarize_cold_starts(results, time.monotonic() - started)
+
+def summarize_cold_starts(results, elapsed_s):
+    """Aggregates ColdStartResults into counts, throughput and p50/p95 task durations."""
+    durations = [r.duration_s for r in results if r.duration_s is not None]
+    succeeded = sum(1 for r in results if r.status == "SUCCESS")
+    return {
+        "total": len(results),
+        "succeeded": succeeded,
+        "failed": sum(1 for r in results if r.status not in ("SUCCESS", "SUBMITTED")),
+        "elapsed_s": round(elapsed_s, 2),
+        "throughput_per_min": round(len(results) * 60 / elapsed_s, 2) if elapsed_s else 0.0,
+        "p50_duration_s": percentile(durations, 50),
+        "p95_duration_s": percentile(durations, 95),
+    }
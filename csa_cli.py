@@ -0,0 +1,344 @@
+"""Headless command line for the CSA utilities.
+
+Each command runs a single target built from its options, or every target
+of a CSV/JSON manifest, processed concurrently. Manifest columns override
+the command-line values, so settings shared by all targets (e.g.
+--api-token) can be given once. One JSON line is printed per target;
+progress messages go to stderr. `propagate` instead treats the whole
+manifest as one policy: catalog sets are grouped per instance, attributes
+shared by several sets are written once, and one consolidated report is
+printed. `cold-start` submits every data product of an instance through
+one orchestrator that watches all their tasks together, then prints a
+summary line after the per-target lines. `get-docs` streams one line per
+document as it arrives, followed by a summary line per target. --metrics prints per-endpoint latency,
+throughput and retry metrics (JSON or Prometheus text) when the run ends.
+
+    python csa_cli.py sensitivity --manifest sets.csv --api-token "$TOKEN" --sync --concurrency 4
+    python csa_cli.py propagate --manifest sets.csv --action set --sync --concurrency 3
+    python csa_cli.py cold-start --manifest products.json --wait
+    python csa_cli.py stub-docs --base-url https://x.alationcloud.com --api-token "$TOKEN" --num-stub-docs 50
+    python csa_cli.py get-docs --base-url https://x.alationcloud.com --api-token "$TOKEN" --doc-id 1-500 --metrics json
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from alation_cache import get_default_cache
+from alation_metrics import METRIC_FORMATS, write_metrics
+from catalog_set_sensitivity import DEFAULT_MAX_WORKERS
+from cold_start import IF_EXISTS_OPTIONS, ColdStartResult, run_cold_starts, summarize_cold_starts
+from Documents.Documents_CreateStubDocuments import DEFAULT_CHUNK_SIZE, create_stub_documents_chunked
+from Documents.Documents_CreateStubDocuments import DEFAULT_MAX_WORKERS as DEFAULT_CHUNK_WORKERS
+from Documents.Documents_RetrieveDocuments import DEFAULT_MAX_WORKERS as DEFAULT_DOC_WORKERS
+from Documents.Documents_RetrieveDocuments import fetch_documents, parse_doc_ids
+from sensitivity_job import (
+    DEFAULT_MAX_SETS,
+    add_selection_options,
+    add_state_max_age_option,
+    propagate_sensitivity,
+    run_sensitivity_job,
+    selection_from_args,
+)
+
+DEFAULT_CONCURRENCY = 4
+SECRET_FIELDS = ("api_token", "api_key")
+# Fields that fall back to an environment variable when not given
+ENV_DEFAULTS = {
+    "api_token": "ALATION_API_TOKEN",
+    "api_key": "ALATION_API_KEY",
+}
+
+# `run_all(targets, args, cache)`, when set, handles every target at once and returns `(ok, report)`
+Command = namedtuple("Command", ["handler", "fields", "help", "add_options", "run_all"], defaults=[None])
+
+_print_lock = threading.Lock()
+
+
+def load_manifest(path):
+    """Reads targets from a CSV file, or a JSON list of objects (optionally under "targets")."""
+    with open(path, newline="") as f:
+        if path.lower().endswith(".json"):
+            targets = json.load(f)
+            if isinstance(targets, dict):
+                targets = targets.get("targets", [])
+        else:
+            targets = list(csv.DictReader(f))
+    return [{k: v for k, v in target.items() if v not in ("", None)} for target in targets]
+
+
+def _int_list(value):
+    if isinstance(value, list):
+        return [int(v) for v in value]
+    return [int(v.strip()) for v in str(value).split(",") if v.strip().isdigit()]
+
+
+def _log(target, message):
+    label = target.get("catalog_set_id") or target.get("data_product_id") or target.get("doc_id") or ""
+    with _print_lock:
+        print(f"[{target.get('base_url', '')} {label}] {message}", file=sys.stderr)
+
+
+# --- Command handlers: each returns (ok, result) ---
+
+def run_sensitivity(target, args, cache):
+    summary = run_sensitivity_job(
+        target["base_url"], target["api_token"], target["catalog_set_id"], target.get("action", "set"),
+        max_workers=int(target.get("max_workers", args.max_workers)), sync=args.sync, dry_run=args.dry_run,
+        fresh=args.fresh, cache=cache, log=lambda message: _log(target, message),
+        selection=selection_from_args(args), state_max_age=args.state_max_age_hours * 3600,
+    )
+    return not summary["failures"], summary
+
+
+def add_sensitivity_options(parser):
+    parser.add_argument("--max-workers", type=int, default=DEFAULT_MAX_WORKERS,
+                        help="Concurrent write requests per catalog set")
+    parser.add_argument("--sync", action="store_true", help="Only write attributes not already in the desired state")
+    parser.add_argument("--dry-run", action="store_true", help="Report how many writes are needed without writing")
+    parser.add_argument("--fresh", action="store_true", help="Ignore checkpoints left by interrupted runs")
+    add_state_max_age_option(parser)
+    add_selection_options(parser)
+
+
+def propagate_all(targets, args, cache):
+    for target in targets:
+        missing = [f for f in ("base_url", "api_token", "catalog_set_id") if f not in target]
+        if missing:
+            return False, {"error": f"Missing required fields: {', '.join(missing)}", "target": target.get("base_url")}
+    actions = {target.get("action", "set") for target in targets}
+    if len(actions) > 1:
+        return False, {"error": f"propagate applies one action, got: {', '.join(sorted(actions))}"}
+
+    def log(message):
+        with _print_lock:
+            print(message, file=sys.stderr)
+
+    report = propagate_sensitivity(
+        targets, actions.pop(), max_instances=args.concurrency, log=log, max_workers=args.max_workers,
+        sync=args.sync, dry_run=args.dry_run, fresh=args.fresh, cache=cache, selection=selection_from_args(args),
+        max_sets=args.max_sets, state_max_age=args.state_max_age_hours * 3600,
+    )
+    return report["ok"], report
+
+
+def add_propagate_options(parser):
+    add_sensitivity_options(parser)
+    parser.add_argument("--max-sets", type=int, default=DEFAULT_MAX_SETS,
+                        help="Catalog sets enumerated at once per instance")
+
+
+def cold_start_all(targets, args, cache):
+    """Cold starts every target, one `run_cold_starts` per instance, tenant and user, all in parallel.
+
+    Prints a JSON line per target as its task finishes (or is submitted,
+    without --wait) and returns the summary across all of them.
+    """
+    groups = {}
+    results = []
+    for target in targets:
+        missing = missing_fields(COMMANDS["cold-start"], target)
+        if missing:
+            error = f"Missing required fields: {', '.join(missing)}"
+        elif target.get("if_exists", "error") not in IF_EXISTS_OPTIONS:
+            error = f"if_exists must be one of {', '.join(IF_EXISTS_OPTIONS)}, got {target['if_exists']!r}"
+        else:
+            error = None
+        if error:
+            _print_outcome("cold-start", target, False, {"error": error})
+            results.append(ColdStartResult(target, None, "SUBMIT_FAILED", None, None))
+            continue
+        key = (target["base_url"], target["tenant_id"], target["user_id"], target["api_key"])
+        groups.setdefault(key, []).append(target)
+
+    def run_group(key, items):
+        base_url, tenant_id, user_id, api_key = key
+        latest = {}
+
+        def on_update(item, task_data):
+            latest[id(item)] = task_data
+
+        def on_done(result):
+            ok = result.status in ("SUCCESS", "SUBMITTED")
+            payload = latest.get(id(result.item)) or {"id": result.task_id, "status": result.status}
+            _print_outcome("cold-start", result.item, ok, payload if result.error is None else result.error)
+
+        if args.wait:
+            _log({"base_url": base_url}, f"Submitting {len(items)} cold starts and watching their tasks together")
+        group_results, _ = run_cold_starts(base_url, tenant_id, items, user_id, api_key,
+                                           max_concurrency=max(1, args.concurrency), on_update=on_update,
+                                           on_done=on_done, wait=args.wait)
+        return group_results
+
+    started = time.monotonic()
+    with ThreadPoolExecutor(max_workers=max(1, min(len(groups), args.concurrency))) as pool:
+        for group_results in pool.map(lambda group: run_group(*group), groups.items()):
+            results += group_results
+    summary = summarize_cold_starts(results, time.monotonic() - started)
+    return not summary["failed"], summary
+
+
+def add_cold_start_options(parser):
+    parser.add_argument("--wait", action="store_true", help="Poll every task until it finishes")
+
+
+def run_stub_docs(target, args, cache):
+    num_stub_docs = int(target.get("num_stub_docs", 3))
+
+    def log_chunk(result):
+        _log(target, f"Chunk {result.start + 1}-{result.start + result.count}: {result.error or result.status}")
+
+    summary = create_stub_documents_chunked(
+        target["base_url"], target["api_token"], num_stub_docs, int(target.get("document_hub_id", 7)),
+        int(target.get("template_id", 72)), int(target.get("parent_folder_id", 57)),
+        _int_list(target.get("nav_link_folder_ids", [58, 59])), chunk_size=args.chunk_size,
+        max_workers=args.chunk_workers, max_retries=args.max_retries, chunk_retries=args.chunk_retries,
+        on_chunk=log_chunk,
+    )
+    return not summary["failed_chunks"] and not summary["monitoring_chunks"], summary
+
+
+def add_stub_docs_options(parser):
+    parser.add_argument("--max-retries", type=int, default=100, help="Max retries for job polling")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="Stub documents per request")
+    parser.add_argument("--chunk-workers", type=int, default=DEFAULT_CHUNK_WORKERS, help="Chunks submitted at once per target")
+    parser.add_argument("--chunk-retries", type=int, default=1, help="Times to re-submit failed chunks")
+
+
+def run_get_docs(target, args, cache):
+    doc_ids = parse_doc_ids(target["doc_id"])
+    documents = fetch_documents(target["base_url"], target["api_token"], doc_ids,
+                                max_workers=int(target.get("max_workers", args.max_workers)),
+                                batch_size=int(target.get("batch_size", args.batch_size)), cache=cache)
+    fetched = 0
+    failed = []
+    # Printed as they arrive, so a large id range is never held in memory
+    for doc_id, result in documents:
+        fetched += 1
+        if "error" in result:
+            failed.append(doc_id)
+        _print_outcome("get-docs", {**target, "doc_id": doc_id}, "error" not in result, result)
+    return not failed, {"documents": fetched, "failed": failed}
+
+
+def add_get_docs_options(parser):
+    parser.add_argument("--max-workers", type=int, default=DEFAULT_DOC_WORKERS, help="Concurrent requests per target")
+    parser.add_argument("--batch-size", type=int, default=1,
+                        help="Ids per request; values above 1 need an instance that accepts repeated id filters")
+
+
+COMMANDS = {
+    "sensitivity": Command(
+        run_sensitivity, ("base_url", "api_token", "catalog_set_id", "action"),
+        "Set or unset the sensitivity flag on catalog set attributes", add_sensitivity_options,
+    ),
+    "propagate": Command(
+        None, ("base_url", "api_token", "catalog_set_id", "action"),
+        "Apply one sensitivity action across many catalog sets and instances, writing each attribute once",
+        add_propagate_options, run_all=propagate_all,
+    ),
+    "cold-start": Command(
+        None,
+        ("base_url", "tenant_id", "data_product_id", "result_cache_database", "result_cache_schema", "if_exists",
+         "user_id", "api_key"),
+        "Cold start Chat with Data Products", add_cold_start_options, run_all=cold_start_all,
+    ),
+    "stub-docs": Command(
+        run_stub_docs,
+        ("base_url", "api_token", "num_stub_docs", "document_hub_id", "template_id", "parent_folder_id",
+         "nav_link_folder_ids"),
+        "Create stub documents", add_stub_docs_options,
+    ),
+    "get-docs": Command(
+        run_get_docs, ("base_url", "api_token", "doc_id"),
+        "Fetch document details", add_get_docs_options,
+    ),
+}
+# Fields a target may omit because its handler supplies a default
+OPTIONAL_FIELDS = {"action", "if_exists", "num_stub_docs", "document_hub_id", "template_id", "parent_folder_id",
+                   "nav_link_folder_ids"}
+
+
+def build_targets(command, args):
+    """Merges manifest rows over the command-line values."""
+    defaults = {}
+    for field in command.fields:
+        value = getattr(args, field)
+        if value is None and field in ENV_DEFAULTS:
+            value = os.environ.get(ENV_DEFAULTS[field])
+        if value is not None:
+            defaults[field] = value
+    rows = load_manifest(args.manifest) if args.manifest else [{}]
+    return [{**defaults, **row} for row in rows]
+
+
+def missing_fields(command, target):
+    return [f for f in command.fields if f not in target and f not in OPTIONAL_FIELDS]
+
+
+def _print_outcome(command_name, target, ok, result):
+    public_target = {k: v for k, v in target.items() if k not in SECRET_FIELDS}
+    with _print_lock:
+        print(json.dumps({"command": command_name, "target": public_target, "ok": ok, "result": result},
+                         default=str), flush=True)
+
+
+def run_target(command, target, args, cache):
+    missing = missing_fields(command, target)
+    if missing:
+        return False, {"error": f"Missing required fields: {', '.join(missing)}"}
+    try:
+        return command.handler(target, args, cache)
+    except Exception as e:
+        return False, {"error": f"{type(e).__name__}: {e}"}
+
+
+def main(argv=None):
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--manifest", help="CSV or JSON file with one target per row")
+    common.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY, help="Targets processed at once")
+    common.add_argument("--no-cache", action="store_true", help="Bypass the local metadata cache")
+    common.add_argument("--metrics", choices=METRIC_FORMATS, help="Print per-endpoint request metrics at the end")
+    common.add_argument("--metrics-file", help="Write the --metrics output to this file instead of stderr")
+
+    parser = argparse.ArgumentParser(description="Run CSA utilities non-interactively")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    for name, command in COMMANDS.items():
+        sub = subparsers.add_parser(name, parents=[common], help=command.help)
+        for field in command.fields:
+            sub.add_argument(f"--{field.replace('_', '-')}", dest=field)
+        if command.add_options:
+            command.add_options(sub)
+    args = parser.parse_args(argv)
+
+    command = COMMANDS[args.command]
+    cache = None if args.no_cache else get_default_cache()
+    targets = build_targets(command, args)
+
+    if command.run_all:
+        ok, report = command.run_all(targets, args, cache)
+        print(json.dumps({"command": args.command, "ok": ok, "result": report}, default=str), flush=True)
+        if args.metrics:
+            write_metrics(args.metrics, args.metrics_file)
+        return 0 if ok else 1
+
+    outcomes = []
+    with ThreadPoolExecutor(max_workers=max(1, args.concurrency)) as pool:
+        futures = {pool.submit(run_target, command, target, args, cache): target for target in targets}
+        for future in as_completed(futures):
+            target = futures[future]
+            ok, result = future.result()
+            outcomes.append(ok)
+            _print_outcome(args.command, target, ok, result)
+    if args.metrics:
+        write_metrics(args.metrics, args.metrics_file)
+    return 0 if all(outcomes) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
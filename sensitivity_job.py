@@ -0,0 +1,425 @@
+"""Resumable bulk sensitivity jobs.
+
+Every write of a bulk run is appended to a checkpoint journal, one
+`attr_id<TAB>action<TAB>status` line per attribute after a header with the
+time the run started. If the run is interrupted (Streamlit session lost,
+browser refresh, Ctrl-C) the next run for the same base URL, catalog set
+and action reads the journal and only retries the attributes that failed
+or were never processed. The journal is removed once a run finishes
+without failures. `open_journal` only resumes journals younger than
+`DEFAULT_RESUME_MAX_AGE`, and discards every other journal sharing a
+catalog set with the run, since its completed writes no longer hold once
+this run has started. Each run also leaves a
+`sensitivity_snapshot` of the attributes it changed, so it can be reverted.
+
+A job may cover several catalog sets; they are enumerated concurrently and
+an attribute that belongs to more than one set is written once.
+`propagate_sensitivity` applies one action across catalog sets on several
+Alation instances in parallel and returns a consolidated report.
+
+Command-line usage:
+
+    python sensitivity_job.py https://x.alationcloud.com TOKEN 42 set --sync
+    python sensitivity_job.py https://x.alationcloud.com TOKEN 42,43,57 set --max-sets 3
+    python sensitivity_job.py https://x.alationcloud.com TOKEN 42 set --search email --schema PII --pattern '*email*'
+"""
+import argparse
+import hashlib
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from alation_cache import DEFAULT_CACHE_PATH, get_default_cache
+from alation_metrics import METRIC_FORMATS, write_metrics
+from catalog_set_members import (
+    ALL_ATTRIBUTES,
+    DEFAULT_MAX_IN_FLIGHT,
+    DEFAULT_PAGE_SIZE,
+    AttributeStore,
+    Selection,
+    collect_attributes,
+    iter_selected_members,
+)
+from catalog_set_sensitivity import (
+    DEFAULT_MAX_WORKERS,
+    DEFAULT_STATE_MAX_AGE,
+    SENSITIVITY_ACTIONS,
+    iter_sensitivity_updates,
+    plan_sensitivity_sync,
+    remember_sensitivity_states,
+    resolve_sensitivity_states,
+)
+from sensitivity_snapshot import SnapshotRecorder
+
+DEFAULT_JOURNAL_DIR = os.path.join(os.path.dirname(DEFAULT_CACHE_PATH), "jobs")
+DEFAULT_MAX_SETS = 2  # catalog sets enumerated at once per instance
+DEFAULT_MAX_INSTANCES = 4
+DEFAULT_RESUME_MAX_AGE = 24 * 60 * 60  # interrupted runs older than this start afresh
+REPORT_COUNTS = ("catalog_sets", "members", "attributes", "duplicates", "skipped", "written")
+
+
+class CheckpointJournal:
+    """Append-only record of per-attribute write outcomes for one job.
+
+    The first line records when the run started, on which base URL and
+    which catalog sets, so `discard_journals` can find every journal a
+    later write on any of those sets makes wrong.
+    """
+
+    def __init__(self, path, base_url=None, catalog_set_ids=None, header_only=False):
+        """Reads the journal at `path`, if any; only its header with `header_only`."""
+        self.path = path
+        self.base_url = base_url
+        self.catalog_set_ids = catalog_set_ids
+        self.statuses = {}
+        self.started = None
+        if os.path.exists(path):
+            with open(path) as f:
+                for line in f:
+                    parts = line.rstrip("\n").split("\t")
+                    if parts[0] == "#started":
+                        self.started = float(parts[1])
+                        # Journals written before the header named their sets cannot be matched, so are never resumed
+                        self.base_url = parts[2] if len(parts) == 4 else None
+                        self.catalog_set_ids = parts[3].split(",") if len(parts) == 4 else None
+                    elif len(parts) == 3 and parts[0].lstrip("-").isdigit():
+                        self.statuses[int(parts[0])] = parts[2]
+                    if header_only:
+                        break
+        self._file = None
+
+    @classmethod
+    def for_job(cls, base_url, catalog_set_id, action, directory=DEFAULT_JOURNAL_DIR):
+        """Returns the journal for this base URL, set of catalog sets (in any order) and action."""
+        base_url = base_url.rstrip("/")
+        catalog_set_ids = sorted(parse_catalog_set_ids(catalog_set_id))
+        sets = ",".join(catalog_set_ids)
+        key = hashlib.sha1(f"{base_url}|{sets}|{action}".encode()).hexdigest()[:16]
+        label = sets.replace(",", "+")[:40]
+        os.makedirs(directory, exist_ok=True)
+        return cls(os.path.join(directory, f"sensitivity-{label}-{action}-{key}.journal"), base_url, catalog_set_ids)
+
+    @property
+    def completed(self):
+        return sum(1 for status in self.statuses.values() if status == "ok")
+
+    def is_stale(self, max_age=DEFAULT_RESUME_MAX_AGE):
+        """True when the journal's run started more than `max_age` seconds ago, or its header is incomplete."""
+        return bool(self.statuses) and (self.started is None or self.catalog_set_ids is None
+                                        or time.time() - self.started > max_age)
+
+    def pending(self, attr_ids):
+        """Returns the ids that have not been written successfully yet."""
+        return [attr_id for attr_id in attr_ids if self.statuses.get(attr_id) != "ok"]
+
+    def record(self, result):
+        if self._file is None:
+            self._file = open(self.path, "a", buffering=1)
+            if self.started is None:
+                self.started = time.time()
+                self._file.write(f"#started\t{self.started}\t{self.base_url}\t{','.join(self.catalog_set_ids)}\n")
+        status = "ok" if result.ok else "failed"
+        self._file.write(f"{result.attr_id}\t{result.action}\t{status}\n")
+        self.statuses[result.attr_id] = status
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def discard(self):
+        """Closes and deletes the journal, so the next run starts fresh."""
+        self.close()
+        self.statuses = {}
+        self.started = None
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+def open_journal(base_url, catalog_set_id, action, fresh=False, max_age=DEFAULT_RESUME_MAX_AGE, log=None,
+                 directory=DEFAULT_JOURNAL_DIR):
+    """Returns the journal a new run of `action` should resume from.
+
+    Every other journal on any of the same catalog sets, whatever its
+    action, is discarded, since this run's writes make it wrong; so is
+    this run's own when `fresh` or older than `max_age`. `log(message)`
+    reports what is resumed or dropped.
+    """
+    journal = CheckpointJournal.for_job(base_url, catalog_set_id, action, directory)
+    discard_journals(base_url, catalog_set_id, directory, keep=journal.path)
+    if journal.statuses and not fresh and journal.is_stale(max_age):
+        if log:
+            log(f"Checkpoint of an interrupted run older than {max_age / 3600:g}h discarded; starting afresh")
+        fresh = True
+    if fresh:
+        journal.discard()
+    elif journal.statuses and log:
+        log(f"Resuming from checkpoint: {journal.completed} attributes already done")
+    return journal
+
+
+def discard_journals(base_url, catalog_set_id, directory=DEFAULT_JOURNAL_DIR, keep=None):
+    """Deletes every journal on `base_url` sharing a catalog set with `catalog_set_id`, except the one at `keep`.
+
+    Used when other writes to those sets are about to make the journals wrong.
+    """
+    if not os.path.isdir(directory):
+        return
+    base_url = base_url.rstrip("/")
+    catalog_set_ids = set(parse_catalog_set_ids(catalog_set_id))
+    for name in os.listdir(directory):
+        path = os.path.join(directory, name)
+        if not name.endswith(".journal") or path == keep:
+            continue
+        journal = CheckpointJournal(path, header_only=True)
+        if journal.base_url == base_url and catalog_set_ids.intersection(journal.catalog_set_ids):
+            journal.discard()
+
+
+def iter_journaled_updates(journal, base_url, api_token, attr_ids, action, max_workers=DEFAULT_MAX_WORKERS,
+                           cache=None, session=None, snapshot=None, on_late_result=None):
+    """Yields WriteResults for the attributes `journal` has not completed.
+
+    Each result is checkpointed before it is yielded; the journal is
+    discarded when every attribute has been written successfully. Results
+    are also recorded in `snapshot` (a SnapshotRecorder), which is saved
+    when the run ends, even if interrupted; its run id is then in
+    `snapshot.saved`. Writes that land after the caller stopped reading are
+    checkpointed and recorded too, then passed to `on_late_result(result)`.
+    """
+    remaining = journal.pending(attr_ids)
+    failed = False
+
+    def record(result):
+        journal.record(result)
+        if snapshot is not None:
+            snapshot.record(result)
+
+    def record_late(result):
+        record(result)
+        if on_late_result:
+            on_late_result(result)
+
+    results = iter_sensitivity_updates(base_url, api_token, remaining, action, max_workers, session=session,
+                                       cache=cache, on_late_result=record_late)
+    try:
+        for result in results:
+            record(result)
+            failed = failed or not result.ok
+            yield result
+    finally:
+        # Runs the writer's cleanup, which reports the late writes, before the snapshot is saved
+        results.close()
+        journal.close()
+        if snapshot is not None:
+            snapshot.save()
+    if not failed:
+        journal.discard()
+
+
+def parse_catalog_set_ids(value):
+    """Returns the distinct ids of a comma-separated string or list, in order."""
+    if isinstance(value, (list, tuple)):
+        ids = [str(v).strip() for v in value]
+    else:
+        ids = [part.strip() for part in str(value).split(",")]
+    return list(dict.fromkeys(i for i in ids if i))
+
+
+def collect_catalog_sets(base_url, api_token, catalog_set_ids, selection=ALL_ATTRIBUTES, page_size=DEFAULT_PAGE_SIZE,
+                         max_in_flight=DEFAULT_MAX_IN_FLIGHT, max_sets=DEFAULT_MAX_SETS, cache=None, session=None):
+    """Enumerates several catalog sets concurrently into one AttributeStore holding each attribute once.
+
+    Returns `(attributes, members_seen, duplicates)`.
+    """
+    def collect(catalog_set_id):
+        downloaded = []
+        members = iter_selected_members(base_url, api_token, catalog_set_id, selection, page_size, max_in_flight,
+                                        session=session, cache=cache, on_page=downloaded.append)
+        store, _ = collect_attributes(members)
+        return store, downloaded[-1] if downloaded else 0
+
+    attributes = AttributeStore()
+    seen_ids = set()
+    members_seen = duplicates = 0
+    with ThreadPoolExecutor(max_workers=max(1, max_sets)) as pool:
+        futures = [pool.submit(collect, catalog_set_id) for catalog_set_id in catalog_set_ids]
+        # Merged in submission order, so the result does not depend on which set lands first
+        for future in futures:
+            store, seen = future.result()
+            members_seen += seen
+            duplicates += attributes.merge(store, seen_ids)
+    return attributes, members_seen, duplicates
+
+
+def run_sensitivity_job(base_url, api_token, catalog_set_id, action, max_workers=DEFAULT_MAX_WORKERS,
+                        page_size=DEFAULT_PAGE_SIZE, max_in_flight=DEFAULT_MAX_IN_FLIGHT, sync=False, dry_run=False,
+                        fresh=False, cache=None, log=print, selection=ALL_ATTRIBUTES, max_sets=DEFAULT_MAX_SETS,
+                        resume_max_age=DEFAULT_RESUME_MAX_AGE, state_max_age=DEFAULT_STATE_MAX_AGE):
+    """Enumerates one or more catalog sets and applies `action` to their attributes, resuming from any checkpoint.
+
+    `catalog_set_id` may be a comma-separated list; attributes in several
+    sets are written once. Only attributes matching `selection` are
+    written. A checkpoint left by an interrupted run is resumed unless
+    `fresh` or older than `resume_max_age`. Flags this tool wrote are
+    trusted for `state_max_age` where the server reports none; a sync run
+    trusts the ones it finds correct for another `state_max_age`. Returns
+    a summary dict with the attribute, write and failure counts.
+    """
+    catalog_set_ids = parse_catalog_set_ids(catalog_set_id)
+    attributes, members_seen, duplicates = collect_catalog_sets(
+        base_url, api_token, catalog_set_ids, selection, page_size, max_in_flight, max_sets, cache
+    )
+    log(f"Total members returned: {members_seen}")
+    if duplicates:
+        log(f"Attributes in more than one catalog set (written once): {duplicates}")
+    log(f"Attributes eligible for sensitivity: {len(attributes)}")
+    summary = {"catalog_sets": len(catalog_set_ids), "members": members_seen, "attributes": len(attributes),
+               "duplicates": duplicates, "skipped": 0, "written": 0, "failures": [], "snapshot": None}
+
+    attr_ids = attributes.ids
+    states = resolve_sensitivity_states(base_url, attr_ids, attributes.sensitivity(), cache, state_max_age)
+    if sync:
+        plan = plan_sensitivity_sync(base_url, attr_ids, None, action, states=states)
+        log(f"Sync: {len(plan.to_write)} attributes need a write ({plan.unknown} with unknown state), "
+            f"{plan.unchanged} already correct")
+        attr_ids = plan.to_write
+        summary["skipped"] = plan.unchanged
+    if dry_run:
+        summary["pending"] = len(attr_ids)
+        return summary
+    if sync:
+        to_write = set(attr_ids)
+        remember_sensitivity_states(base_url, {a: s for a, s in states.items() if a not in to_write}, cache)
+
+    journal = open_journal(base_url, ",".join(catalog_set_ids), action, fresh, resume_max_age, log)
+
+    snapshot = SnapshotRecorder(base_url, catalog_set_ids, action, states)
+    for result in iter_journaled_updates(journal, base_url, api_token, attr_ids, action, max_workers, cache=cache,
+                                         snapshot=snapshot):
+        summary["written"] += 1
+        if not result.ok:
+            summary["failures"].append((result.attr_id, result.error))
+    if snapshot.saved:
+        summary["snapshot"] = snapshot.saved
+        log(f"Snapshot {snapshot.saved}: {len(snapshot.changed)} attributes changed, "
+            f"{len(snapshot.unknown)} with unknown prior state")
+    return summary
+
+
+def propagate_sensitivity(targets, action, max_instances=DEFAULT_MAX_INSTANCES, log=print, **job_options):
+    """Applies `action` to the catalog sets of every target, one job per Alation instance.
+
+    Each target is a dict with `base_url`, `api_token`, `catalog_set_id`
+    (optionally comma-separated) and optionally `max_workers`. Targets on
+    the same instance are merged, so overlapping sets are written once;
+    they must share one `api_token` and any `max_workers` they give, or the
+    instance is not run and reports an error instead. Instances run in
+    parallel, at most `max_instances` at a time, each with its own write
+    concurrency; `job_options` are passed on to `run_sensitivity_job`.
+    Returns a report with a summary per instance and the totals.
+    """
+    instances = {}
+    for target in targets:
+        base_url = target["base_url"].rstrip("/")
+        instance = instances.setdefault(base_url, {"api_tokens": set(), "catalog_set_ids": [], "max_workers": set()})
+        instance["api_tokens"].add(target["api_token"])
+        if target.get("max_workers"):
+            instance["max_workers"].add(int(target["max_workers"]))
+        instance["catalog_set_ids"] += parse_catalog_set_ids(target["catalog_set_id"])
+
+    def conflict(instance):
+        if len(instance["api_tokens"]) > 1:
+            return "Targets on this instance give different api_token values; use one token per instance"
+        if len(instance["max_workers"]) > 1:
+            values = ", ".join(str(value) for value in sorted(instance["max_workers"]))
+            return f"Targets on this instance give different max_workers values ({values}); use one per instance"
+        return None
+
+    def run(base_url, instance):
+        error = conflict(instance)
+        if error:
+            return {"error": error, "failures": []}
+        options = dict(job_options)
+        if instance["max_workers"]:
+            options["max_workers"] = next(iter(instance["max_workers"]))
+        try:
+            return run_sensitivity_job(base_url, next(iter(instance["api_tokens"])), instance["catalog_set_ids"],
+                                       action, log=lambda message: log(f"[{base_url}] {message}"), **options)
+        except Exception as e:
+            return {"error": f"{type(e).__name__}: {e}", "failures": []}
+
+    with ThreadPoolExecutor(max_workers=max(1, max_instances)) as pool:
+        futures = {base_url: pool.submit(run, base_url, instance) for base_url, instance in instances.items()}
+        summaries = {base_url: future.result() for base_url, future in futures.items()}
+
+    totals = {key: sum(summary.get(key, 0) for summary in summaries.values()) for key in REPORT_COUNTS}
+    totals["failures"] = sum(len(summary["failures"]) for summary in summaries.values())
+    totals["failed_instances"] = sum(1 for summary in summaries.values() if "error" in summary)
+    return {
+        "action": action,
+        "ok": not totals["failures"] and not totals["failed_instances"],
+        "instances": summaries,
+        "totals": totals,
+    }
+
+
+def add_selection_options(parser):
+    parser.add_argument("--search", default="", help="Server-side search term narrowing the members downloaded")
+    parser.add_argument("--datasource", action="append", default=[], help="Only attributes of this data source title")
+    parser.add_argument("--schema", action="append", default=[], help="Only attributes of this schema title")
+    parser.add_argument("--table", action="append", default=[], help="Only attributes of this table title")
+    parser.add_argument("--pattern", action="append", default=[],
+                        help="Only attributes whose title matches this glob, e.g. '*email*'")
+
+
+def add_state_max_age_option(parser):
+    parser.add_argument("--state-max-age-hours", type=float, default=DEFAULT_STATE_MAX_AGE / 3600,
+                        help="Hours a flag this tool wrote is trusted when the server does not report it "
+                             "(at most 168, as older records are dropped)")
+
+
+def selection_from_args(args):
+    return Selection(search=args.search, datasources=tuple(args.datasource), schemas=tuple(args.schema),
+                     tables=tuple(args.table), patterns=tuple(args.pattern))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Set or unset the sensitivity flag on every attribute of a catalog set")
+    parser.add_argument("base_url", type=str, help="Alation BASE URL")
+    parser.add_argument("api_token", type=str, help="API Token")
+    parser.add_argument("catalog_set_id", type=str, help="Catalog Set ID, or several separated by commas")
+    parser.add_argument("action", choices=sorted(SENSITIVITY_ACTIONS), help="Set or unset the flag")
+    parser.add_argument("--max-workers", type=int, default=DEFAULT_MAX_WORKERS, help="Concurrent write requests")
+    parser.add_argument("--page-size", type=int, default=DEFAULT_PAGE_SIZE, help="Members page size")
+    parser.add_argument("--max-in-flight", type=int, default=DEFAULT_MAX_IN_FLIGHT, help="Member pages fetched at once")
+    parser.add_argument("--max-sets", type=int, default=DEFAULT_MAX_SETS, help="Catalog sets enumerated at once")
+    parser.add_argument("--sync", action="store_true", help="Only write attributes not already in the desired state")
+    parser.add_argument("--dry-run", action="store_true", help="Report how many writes are needed without writing")
+    parser.add_argument("--fresh", action="store_true", help="Ignore any checkpoint left by an interrupted run")
+    parser.add_argument("--no-cache", action="store_true", help="Bypass the local metadata cache")
+    add_state_max_age_option(parser)
+    add_selection_options(parser)
+    parser.add_argument("--metrics", choices=METRIC_FORMATS, help="Print per-endpoint request metrics at the end")
+    parser.add_argument("--metrics-file", help="Write the --metrics output to this file instead of stderr")
+    args = parser.parse_args(argv)
+
+    summary = run_sensitivity_job(
+        args.base_url, args.api_token, args.catalog_set_id, args.action, max_workers=args.max_workers,
+        page_size=args.page_size, max_in_flight=args.max_in_flight, sync=args.sync, dry_run=args.dry_run,
+        fresh=args.fresh, cache=None if args.no_cache else get_default_cache(),
+        selection=selection_from_args(args), max_sets=args.max_sets, state_max_age=args.state_max_age_hours * 3600,
+    )
+    failures = summary["failures"]
+    for attr_id, error in failures:
+        print(f"{attr_id}\t{error}", file=sys.stderr)
+    if not args.dry_run:
+        print(f"{args.action.capitalize()} completed with {len(failures)} failures.")
+    if args.metrics:
+        write_metrics(args.metrics, args.metrics_file)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
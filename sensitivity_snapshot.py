@@ -0,0 +1,281 @@
+"""Rollback snapshots for bulk sensitivity runs.
+
+Every bulk run records which attributes it actually changed: those it
+wrote successfully whose flag was known to be in the other state
+beforehand. Attributes whose prior state was unknown are kept apart, and
+attributes that already had the desired flag are left out, so a revert
+never clears a flag that was set before the run. Because a run applies a
+single action, the prior state of a changed attribute is implied by it
+and only ids are stored: sorted, delta-encoded and zlib-compressed, which
+keeps even a 100k-attribute run to a few hundred KB. The most recent
+`DEFAULT_MAX_SNAPSHOTS` runs are kept.
+
+`revert_snapshot` re-writes only the changed attributes, with the same
+concurrent write path as the run itself, and records its own snapshot so
+a revert can be reverted too.
+
+Command-line usage:
+
+    python sensitivity_snapshot.py list
+    python sensitivity_snapshot.py revert TOKEN 20261018-142501-set-3fa2c1
+"""
+import argparse
+import json
+import os
+import secrets
+import sys
+import time
+import zlib
+from array import array
+
+from alation_cache import DEFAULT_CACHE_PATH, get_default_cache
+from catalog_set_sensitivity import DEFAULT_MAX_WORKERS, iter_sensitivity_updates
+
+DEFAULT_SNAPSHOT_DIR = os.path.join(os.path.dirname(DEFAULT_CACHE_PATH), "snapshots")
+DEFAULT_MAX_SNAPSHOTS = 500
+OPPOSITE_ACTIONS = {"set": "unset", "unset": "set"}
+
+
+def encode_ids(ids):
+    """Packs ids as sorted little-endian int64 deltas, zlib-compressed."""
+    ordered = sorted(ids)
+    deltas = array("q", (b - a for a, b in zip([0] + ordered, ordered)))
+    if sys.byteorder != "little":
+        deltas.byteswap()
+    return zlib.compress(deltas.tobytes(), 9)
+
+
+def decode_ids(data):
+    deltas = array("q")
+    deltas.frombytes(zlib.decompress(data))
+    if sys.byteorder != "little":
+        deltas.byteswap()
+    ids = array("q")
+    total = 0
+    for delta in deltas:
+        total += delta
+        ids.append(total)
+    return ids
+
+
+class SensitivitySnapshot:
+    """The attributes one run changed (and those whose prior state was unknown), plus run metadata.
+
+    Stored as one JSON metadata line followed by the two encoded id
+    arrays, whose byte lengths are in the metadata.
+    """
+
+    def __init__(self, meta, changed, unknown, path=None):
+        self.meta = meta
+        self.changed = changed
+        self.unknown = unknown
+        self.path = path
+
+    @property
+    def run_id(self):
+        return self.meta["run_id"]
+
+    @property
+    def action(self):
+        return self.meta["action"]
+
+    @property
+    def base_url(self):
+        return self.meta["base_url"]
+
+    def save(self, directory=DEFAULT_SNAPSHOT_DIR):
+        changed, unknown = encode_ids(self.changed), encode_ids(self.unknown)
+        self.meta.update(changed=len(self.changed), unknown=len(self.unknown), changed_bytes=len(changed),
+                         unknown_bytes=len(unknown))
+        os.makedirs(directory, exist_ok=True)
+        self.path = self.path or os.path.join(directory, f"sensitivity-{self.run_id}.snapshot")
+        tmp = self.path + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(json.dumps(self.meta).encode() + b"\n")
+            f.write(changed)
+            f.write(unknown)
+        os.replace(tmp, self.path)
+        prune_snapshots(directory)
+        return self
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "rb") as f:
+            meta = json.loads(f.readline())
+            changed = decode_ids(f.read(meta["changed_bytes"]))
+            unknown = decode_ids(f.read(meta["unknown_bytes"]))
+        return cls(meta, changed, unknown, path)
+
+
+def read_meta(path):
+    """Returns a snapshot's metadata without decoding its ids."""
+    with open(path, "rb") as f:
+        meta = json.loads(f.readline())
+    meta["path"] = path
+    return meta
+
+
+def _snapshot_paths(directory):
+    """Returns the snapshot files oldest first; run ids start with their timestamp."""
+    if not os.path.isdir(directory):
+        return []
+    return [os.path.join(directory, name) for name in sorted(os.listdir(directory)) if name.endswith(".snapshot")]
+
+
+def list_snapshots(base_url=None, directory=DEFAULT_SNAPSHOT_DIR):
+    """Returns the metadata of every snapshot (for `base_url` only, when given), newest first."""
+    metas = [read_meta(path) for path in reversed(_snapshot_paths(directory))]
+    if base_url:
+        metas = [meta for meta in metas if meta["base_url"] == base_url.rstrip("/")]
+    return metas
+
+
+def find_snapshot(run_id, directory=DEFAULT_SNAPSHOT_DIR):
+    return SensitivitySnapshot.load(os.path.join(directory, f"sensitivity-{run_id}.snapshot"))
+
+
+def prune_snapshots(directory=DEFAULT_SNAPSHOT_DIR, keep=DEFAULT_MAX_SNAPSHOTS):
+    """Deletes all but the `keep` most recent snapshots."""
+    paths = _snapshot_paths(directory)
+    for path in paths[:max(0, len(paths) - keep)]:
+        os.remove(path)
+
+
+class SnapshotRecorder:
+    """Collects a run's successful writes against the states they replaced.
+
+    `prior_states` maps attribute ids to True/False/None as they were
+    before the run, e.g. from `resolve_sensitivity_states`.
+    """
+
+    def __init__(self, base_url, catalog_set_ids, action, prior_states, reverts=None):
+        self.base_url = base_url.rstrip("/")
+        self.catalog_set_ids = list(catalog_set_ids)
+        self.action = action
+        self.prior_states = prior_states
+        self.reverts = reverts
+        self.changed = array("q")
+        self.unknown = array("q")
+        self.unchanged = 0
+        self.saved = None
+
+    def record(self, result):
+        if not result.ok:
+            return
+        prior = self.prior_states.get(result.attr_id)
+        if prior is None:
+            self.unknown.append(result.attr_id)
+        elif prior != (self.action == "set"):
+            self.changed.append(result.attr_id)
+        else:
+            self.unchanged += 1
+
+    def save(self, directory=DEFAULT_SNAPSHOT_DIR):
+        """Writes the snapshot, sets `saved` to its run id and returns it; None when the run changed nothing."""
+        if self.saved or (not self.changed and not self.unknown):
+            return None
+        run_id = f"{time.strftime('%Y%m%d-%H%M%S')}-{self.action}-{secrets.token_hex(3)}"
+        meta = {
+            "run_id": run_id,
+            "created": time.time(),
+            "base_url": self.base_url,
+            "catalog_set_ids": self.catalog_set_ids,
+            "action": self.action,
+            "unchanged": self.unchanged,
+            "reverts": self.reverts,
+            "reverted_by": None,
+        }
+        snapshot = SensitivitySnapshot(meta, self.changed, self.unknown).save(directory)
+        self.saved = run_id
+        return snapshot
+
+
+def revert_snapshot(snapshot, api_token, max_workers=DEFAULT_MAX_WORKERS, include_unknown=False, cache=None,
+                    session=None, on_result=None, should_stop=None, directory=DEFAULT_SNAPSHOT_DIR):
+    """Restores the prior flag of every attribute `snapshot`'s run changed.
+
+    Attributes whose prior state was unknown are only reverted (to the
+    opposite of the run's action) with `include_unknown`. `on_result(done,
+    total, result)` is called after each write; the revert stops early
+    once `should_stop()` is true. Returns a summary dict including the
+    revert's own snapshot id.
+    """
+    # Imported here because sensitivity_job records its runs through this module
+    from sensitivity_job import discard_journals
+
+    action = OPPOSITE_ACTIONS[snapshot.action]
+    # Checkpoints of interrupted runs on these sets would skip attributes the revert is about to change
+    discard_journals(snapshot.base_url, ",".join(snapshot.meta["catalog_set_ids"]))
+    attr_ids = list(snapshot.changed) + (list(snapshot.unknown) if include_unknown else [])
+    # Every attribute reverted was last written by the run, so its current state is the run's target
+    recorder = SnapshotRecorder(snapshot.base_url, snapshot.meta["catalog_set_ids"], action,
+                                dict.fromkeys(attr_ids, snapshot.action == "set"), reverts=snapshot.run_id)
+    failures = []
+    done = 0
+
+    def record(result):
+        nonlocal done
+        done += 1
+        recorder.record(result)
+        if not result.ok:
+            failures.append((result.attr_id, result.error))
+        if on_result:
+            on_result(done, len(attr_ids), result)
+
+    results = iter_sensitivity_updates(snapshot.base_url, api_token, attr_ids, action, max_workers, session=session,
+                                       cache=cache, on_late_result=record)
+    try:
+        for result in results:
+            record(result)
+            if should_stop and should_stop():
+                break
+    finally:
+        results.close()
+        revert = recorder.save(directory)
+    if revert is not None and done == len(attr_ids) and not failures:
+        snapshot.meta["reverted_by"] = revert.run_id
+        snapshot.save(directory)
+    return {
+        "run_id": snapshot.run_id,
+        "action": action,
+        "attributes": len(attr_ids),
+        "written": done,
+        "skipped_unknown": 0 if include_unknown else len(snapshot.unknown),
+        "failures": failures,
+        "snapshot": revert.run_id if revert is not None else None,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="List or revert bulk sensitivity runs")
+    commands = parser.add_subparsers(dest="command", required=True)
+    list_parser = commands.add_parser("list", help="List the stored snapshots, newest first")
+    list_parser.add_argument("--base-url", help="Only snapshots of this Alation instance")
+    revert_parser = commands.add_parser("revert", help="Restore the flags a run changed")
+    revert_parser.add_argument("api_token", type=str, help="API Token")
+    revert_parser.add_argument("run_id", type=str, help="Run id from `list`")
+    revert_parser.add_argument("--max-workers", type=int, default=DEFAULT_MAX_WORKERS, help="Concurrent write requests")
+    revert_parser.add_argument("--include-unknown", action="store_true",
+                               help="Also revert attributes whose state before the run was unknown")
+    revert_parser.add_argument("--no-cache", action="store_true", help="Bypass the local metadata cache")
+    args = parser.parse_args(argv)
+
+    if args.command == "list":
+        for meta in list_snapshots(args.base_url):
+            reverted = f", reverted by {meta['reverted_by']}" if meta["reverted_by"] else ""
+            print(f"{meta['run_id']}\t{meta['base_url']}\tsets {','.join(meta['catalog_set_ids'])}\t"
+                  f"{meta['action']}: {meta['changed']} changed, {meta['unknown']} unknown{reverted}")
+        return 0
+
+    snapshot = find_snapshot(args.run_id)
+    summary = revert_snapshot(snapshot, args.api_token, args.max_workers, args.include_unknown,
+                              cache=None if args.no_cache else get_default_cache())
+    for attr_id, error in summary["failures"]:
+        print(f"{attr_id}\t{error}", file=sys.stderr)
+    print(f"Reverted {summary['written'] - len(summary['failures'])} of {summary['attributes']} attributes "
+          f"({summary['skipped_unknown']} with unknown prior state skipped); snapshot {summary['snapshot']}.")
+    return 1 if summary["failures"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,98 +1,18 @@
 import streamlit as st
-import requests
-import shlex
-import time
 from datetime import datetime
-
-# --- API Call Functions ---
-
-def generate_curl_command(base_url, tenant_id, data_product_id, db, schema, if_exists, user_id, api_key):
-    """Generates the cURL command string from user inputs."""
-    # Clean inputs by stripping whitespace
-    base_url = base_url.strip()
-    tenant_id = tenant_id.strip()
-    data_product_id = data_product_id.strip()
-    db = db.strip()
-    schema = schema.strip()
-    user_id = user_id.strip()
-    api_key = api_key.strip()
-    
-    url = (
-        f"{base_url}/nsapi/api/v3/orgs/{tenant_id}/data_product/cold_start_from_data_product_id"
-        f"?data_product_id={data_product_id}"
-        f"&result_cache_database={db}"
-        f"&result_cache_schema={schema}"
-        f"&if_exists={if_exists}"
-    )
-    
-    command_parts = [
-        'curl', '-X', 'POST', shlex.quote(url),
-        '-H', 'accept: application/json',
-        '-H', f'alation-user-id: {shlex.quote(user_id)}',
-        '-H', f'Authorization: AlationAPIKey {shlex.quote(api_key)}'
-    ]
-    return ' '.join(command_parts)
-
-def execute_api_call(base_url, tenant_id, data_product_id, db, schema, if_exists, user_id, api_key):
-    """Executes the initial Cold Start API call."""
-    base_url = base_url.strip()
-    tenant_id = tenant_id.strip()
-    
-    url = f"{base_url}/nsapi/api/v3/orgs/{tenant_id}/data_product/cold_start_from_data_product_id"
-    headers = {
-        'accept': 'application/json',
-        'alation-user-id': user_id.strip(),
-        'Authorization': f'AlationAPIKey {api_key.strip()}'
-    }
-    params = {
-        'data_product_id': data_product_id.strip(),
-        'result_cache_database': db.strip(),
-        'result_cache_schema': schema.strip(),
-        'if_exists': if_exists
-    }
-    
-    try:
-        response = requests.post(url, headers=headers, params=params, timeout=30)
-        response.raise_for_status()
-        return True, response, None
-    except requests.exceptions.HTTPError as e:
-        error_details = {"status_code": e.response.status_code, "reason": e.response.reason, "url": e.request.url}
-        try:
-            error_details["body"] = e.response.json()
-        except ValueError:
-            error_details["body"] = e.response.text
-        return False, None, error_details
-    except requests.exceptions.RequestException as e:
-        return False, None, {"error_type": "Network Error", "message": str(e)}
-
-def check_task_status(base_url, tenant_id, task_id, user_id, api_key):
-    """Checks the status of a given task ID."""
-    base_url = base_url.strip()
-    tenant_id = tenant_id.strip()
-    task_id = task_id.strip()
-
-    # Note: Using the v1 tasks endpoint as per the user's example
-    url = f"{base_url}/nsapi/api/v1/accounts/{tenant_id}/tasks/{task_id}"
-    headers = {
-        'accept': 'application/json',
-        'alation-user-id': user_id.strip(),
-        # Assuming the same authorization method is needed for the tasks endpoint
-        'Authorization': f'AlationAPIKey {api_key.strip()}'
-    }
-
-    try:
-        response = requests.get(url, headers=headers, timeout=30)
-        response.raise_for_status()
-        return True, response.json(), None
-    except requests.exceptions.HTTPError as e:
-        error_details = {"status_code": e.response.status_code, "reason": e.response.reason, "url": e.request.url}
-        try:
-            error_details["body"] = e.response.json()
-        except ValueError:
-            error_details["body"] = e.response.text
-        return False, None, error_details
-    except requests.exceptions.RequestException as e:
-        return False, None, {"error_type": "Network Error", "message": str(e)}
+from functools import partial
+
+from cold_start import (
+    DEFAULT_MAX_CONCURRENCY,
+    IF_EXISTS_OPTIONS,
+    POLLING_INTERVAL,
+    execute_api_call,
+    generate_curl_command,
+    parse_cold_start_items,
+    run_cold_starts,
+    wait_for_tasks,
+)
+from streamlit_render import render_jobs, render_json, render_live_metrics, render_table, session_jobs, submit_job
 
 # --- Streamlit App UI ---
 
@@ -113,7 +33,7 @@ with col1:
     base_url = st.text_input("Base URL", placeholder="https://your-alation-instance.com")
     tenant_id = st.text_input("Tenant ID (Account ID)", placeholder="e.g., 123e4567-e89b-12d3-a456-426614174000")
     data_product_id = st.text_input("Data Product ID", placeholder="e.g., my-data-product")
-    if_exists = st.selectbox("If Exists Strategy", options=["error", "archive", "delete"], index=0)
+    if_exists = st.selectbox("If Exists Strategy", options=IF_EXISTS_OPTIONS, index=0)
 with col2:
     result_cache_db = st.text_input("Result Cache Database", placeholder="e.g., PROD_DB")
     result_cache_schema = st.text_input("Result Cache Schema", placeholder="e.g., ANALYTICS")
@@ -144,7 +64,7 @@ with execute_col:
         if success:
             response_json = response.json()
             st.success(f"Success! Status Code: {response.status_code}. Task submitted.")
-            st.json(response_json)
+            render_json(response_json, key="cold_start_response", file_name="cold_start_response.json")
             if 'id' in response_json:
                 st.session_state.task_id = response_json['id']
                 st.info(f"Task ID **{st.session_state.task_id}** has been captured. Proceed to Step 3 to track its progress.")
@@ -155,7 +75,7 @@ with execute_col:
                 st.write(f"**Status Code:** `{error_details['status_code']} {error_details['reason']}`")
                 st.write("**Server Response:**")
                 if isinstance(error_details['body'], (dict, list)):
-                    st.json(error_details['body'])
+                    render_json(error_details['body'], key="cold_start_error", file_name="cold_start_error.json")
                 else:
                     st.code(error_details['body'], language='text')
             else:
@@ -167,54 +87,134 @@ if not all_fields_filled:
 st.divider()
 
 # --- Task Progress Tracking ---
-if st.session_state.task_id:
+# Polling runs as background jobs: the page stays usable and several tasks can be tracked at once
+def track_task(job, task_id, **connection):
+    """Background job body: polls one task until it finishes and returns its PollResult."""
+    def on_update(_, task_data):
+        job.update(message=f"Status: {task_data.get('status', 'UNKNOWN')}", details=task_data)
+
+    return wait_for_tasks(task_ids=[task_id], on_update=on_update, should_stop=job.is_cancelled, **connection)[task_id]
+
+def show_task_status(task_data, key):
+    current_status = task_data.get("status", "UNKNOWN")
+
+    if current_status == "SUCCESS":
+        st.success(f"Task Completed: {current_status}")
+    elif current_status in ["FAILURE", "ERROR", "CANCELLED"]:
+        st.error(f"Task Stopped: {current_status}")
+    else:
+        st.info(f"Task In Progress: {current_status}")
+
+    # Display key details
+    status_col1, status_col2, status_col3 = st.columns(3)
+    status_col1.metric("Created At", datetime.fromisoformat(task_data['created_at'].replace('Z', '+00:00')).strftime('%H:%M:%S'))
+    if task_data.get("completed_at"):
+        status_col2.metric("Completed At", datetime.fromisoformat(task_data['completed_at'].replace('Z', '+00:00')).strftime('%H:%M:%S'))
+    else:
+        status_col2.metric("Completed At", "N/A")
+
+    if task_data.get("duration_ms"):
+        duration_sec = task_data['duration_ms'] / 1000
+        status_col3.metric("Duration", f"{duration_sec:.2f} s")
+    else:
+        status_col3.metric("Duration", "N/A")
+
+    with st.expander("Full Task Details"):
+        render_json(task_data, key=key, file_name="task.json")
+
+def show_tracking_job(job):
+    if job.details:
+        show_task_status(job.details, key=f"task_{job.id}")
+    result = job.result
+    if result is not None and result.error and job.status != "cancelled":
+        st.error("Failed to retrieve task status.")
+        render_json(result.error, key=f"task_error_{job.id}", file_name="task_error.json")
+
+if st.session_state.task_id or session_jobs("cold-start-task"):
     st.header("3. Track Task Progress")
-    st.write(f"**Current Task ID:** `{st.session_state.task_id}`")
+    if st.session_state.task_id:
+        st.write(f"**Current Task ID:** `{st.session_state.task_id}`")
+        st.caption(f"Polled every {POLLING_INTERVAL}s at first, backing off while the status is unchanged.")
 
-    if st.button("🔄 Track Task Progress", type="secondary"):
-        status_placeholder = st.empty()
-        
-        POLLING_INTERVAL = 5 # seconds
-        TERMINAL_STATUSES = ["SUCCESS", "FAILURE", "CANCELLED", "ERROR"]
-        
-        with st.spinner(f"Polling task status every {POLLING_INTERVAL} seconds..."):
-            current_status = ""
-            while current_status not in TERMINAL_STATUSES:
-                success, task_data, error_details = check_task_status(base_url, tenant_id, st.session_state.task_id, alation_user_id, alation_api_key)
-
-                with status_placeholder.container():
-                    if success:
-                        current_status = task_data.get("status", "UNKNOWN")
-                        
-                        if current_status == "SUCCESS":
-                            st.success(f"Task Completed: {current_status}")
-                        elif current_status in ["FAILURE", "ERROR", "CANCELLED"]:
-                            st.error(f"Task Stopped: {current_status}")
-                        else:
-                            st.info(f"Task In Progress: {current_status}")
-
-                        # Display key details
-                        status_col1, status_col2, status_col3 = st.columns(3)
-                        status_col1.metric("Created At", datetime.fromisoformat(task_data['created_at'].replace('Z', '+00:00')).strftime('%H:%M:%S'))
-                        if task_data.get("completed_at"):
-                            status_col2.metric("Completed At", datetime.fromisoformat(task_data['completed_at'].replace('Z', '+00:00')).strftime('%H:%M:%S'))
-                        else:
-                            status_col2.metric("Completed At", "N/A")
-                        
-                        if task_data.get("duration_ms"):
-                            duration_sec = task_data['duration_ms'] / 1000
-                            status_col3.metric("Duration", f"{duration_sec:.2f} s")
-                        else:
-                            status_col3.metric("Duration", "N/A")
-                        
-                        with st.expander("Full Task Details"):
-                            st.json(task_data)
-
-                    else:
-                        st.error("Failed to retrieve task status.")
-                        st.json(error_details)
-                        break # Exit loop on error
-                
-                if current_status not in TERMINAL_STATUSES:
-                    time.sleep(POLLING_INTERVAL)
+        if st.button("🔄 Track Task Progress", type="secondary"):
+            task_id = st.session_state.task_id
+            work = partial(track_task, task_id=task_id, base_url=base_url, tenant_id=tenant_id,
+                           user_id=alation_user_id, api_key=alation_api_key)
+            try:
+                submit_job("cold-start-task", f"Task {task_id}", work, key=task_id)
+            except ValueError as e:
+                st.warning(str(e))
+
+    render_jobs("cold-start-task", show_tracking_job)
+
+st.divider()
+
+# --- Batch Cold Start ---
+def run_batch(job, items, **options):
+    """Background job body: cold starts every item and returns `(results, summary)`."""
+    # Keyed by line, so a data product listed twice keeps a row per submission
+    lines = {id(item): i for i, item in enumerate(items)}
+    rows = {i: {"data_product_id": item["data_product_id"], "task_id": None, "status": "QUEUED", "duration_s": None}
+            for i, item in enumerate(items)}
+    job.update(0, len(items), details=rows)
+
+    def on_submit(item, task_id, error_details):
+        row = rows[lines[id(item)]]
+        row["task_id"] = task_id
+        row["status"] = "SUBMITTED" if task_id else "SUBMIT_FAILED"
+
+    def on_update(item, task_data):
+        rows[lines[id(item)]]["status"] = task_data.get("status", "UNKNOWN")
+
+    def on_done(result):
+        row = rows[lines[id(result.item)]]
+        row["status"] = result.status
+        row["duration_s"] = result.duration_s
+        job.update(job.done + 1, message=f"{job.done + 1} of {len(items)} finished")
+
+    return run_cold_starts(items=items, on_submit=on_submit, on_update=on_update, on_done=on_done,
+                           should_stop=job.is_cancelled, **options)
+
+def show_batch_job(job):
+    if job.details:
+        render_table(list(job.details.values()), key=f"batch_rows_{job.id}")
+    if job.result is None:
+        return
+    results, summary = job.result
+    metric_cols = st.columns(5)
+    metric_cols[0].metric("Succeeded", summary["succeeded"])
+    metric_cols[1].metric("Failed", summary["failed"])
+    metric_cols[2].metric("Throughput", f"{summary['throughput_per_min']:.1f} /min")
+    metric_cols[3].metric("p50 Duration", f"{summary['p50_duration_s']:.2f} s" if summary["p50_duration_s"] is not None else "N/A")
+    metric_cols[4].metric("p95 Duration", f"{summary['p95_duration_s']:.2f} s" if summary["p95_duration_s"] is not None else "N/A")
+    failures = [{"data_product_id": r.item["data_product_id"], "status": r.status, "error": r.error}
+                for r in results if r.status not in ("SUCCESS", "SUBMITTED")]
+    if failures:
+        with st.expander(f"Failures ({len(failures)})"):
+            render_table(failures, key=f"batch_failures_{job.id}")
+
+st.header("4. Batch Cold Start")
+st.caption(
+    "One data product per line as `data_product_id[,result_cache_database,result_cache_schema,if_exists]`. "
+    "Omitted columns use the values from step 1."
+)
+batch_text = st.text_area("Data Products", placeholder="sales-dp\nfinance-dp,FIN_DB,MARTS,archive", height=150)
+batch_concurrency = st.number_input("Max Concurrent Submissions", value=DEFAULT_MAX_CONCURRENCY, min_value=1, max_value=32)
+batch_ready = all([base_url, tenant_id, alation_user_id, alation_api_key, batch_text.strip()])
+
+if st.button("⚡ Execute Batch Cold Start", disabled=not batch_ready):
+    try:
+        items = parse_cold_start_items(batch_text, result_cache_db, result_cache_schema, if_exists)
+    except ValueError as e:
+        st.error(str(e))
+    else:
+        work = partial(run_batch, items=items, base_url=base_url, tenant_id=tenant_id, user_id=alation_user_id,
+                       api_key=alation_api_key, max_concurrency=int(batch_concurrency))
+        submit_job("cold-start-batch", f"Cold start {len(items)} data products", work)
+
+render_jobs("cold-start-batch", show_batch_job)
+
+st.divider()
 
+with st.expander("📈 API Metrics"):
+    render_live_metrics()
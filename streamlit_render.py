@@ -0,0 +1,149 @@
+"""Streamlit rendering helpers that stay responsive with large results.
+
+Every widget update is a websocket message and every table or JSON payload
+is serialised in full, so the apps render through these helpers instead:
+tables are paginated slices of a frame built once, JSON is truncated for
+display with the full payload offered as a download, and long-running
+work is shown by `render_jobs`, which redraws `background_jobs` progress
+once a second rather than on every result. Jobs are started with
+`submit_job`, which records them as this browser session's, so a session
+only ever sees and cancels its own. `render_live_metrics` redraws the API
+metrics along with them. `cached_session` keeps the Alation client
+session across reruns.
+"""
+import json
+
+import pandas as pd
+import streamlit as st
+
+from alation_client import get_session
+from alation_metrics import render_metrics
+from background_jobs import get_registry
+
+DEFAULT_PAGE_ROWS = 1000
+JSON_MAX_ITEMS = 50  # list items / dict keys shown per level
+JSON_MAX_STRING = 2000
+JOBS_REFRESH_INTERVAL = 1.0  # seconds between job panel refreshes while a job is active
+SESSION_JOBS_KEY = "background_job_ids"
+JOB_ICONS = {"queued": "⏳", "running": "🔄", "succeeded": "✅", "failed": "❌", "cancelled": "🛑"}
+
+
+def render_table(frame, key, page_rows=DEFAULT_PAGE_ROWS, container=st):
+    """Shows a DataFrame (or anything `pd.DataFrame` accepts) one page of `page_rows` at a time."""
+    if not isinstance(frame, pd.DataFrame):
+        frame = pd.DataFrame(frame)
+    if len(frame) <= page_rows:
+        container.dataframe(frame, hide_index=True)
+        return
+    pages = -(-len(frame) // page_rows)
+    page = container.number_input(f"Page (of {pages})", min_value=1, max_value=pages, value=1, key=f"{key}_page")
+    start = (int(page) - 1) * page_rows
+    container.caption(f"Rows {start + 1}-{min(start + page_rows, len(frame))} of {len(frame)}")
+    container.dataframe(frame.iloc[start:start + page_rows], hide_index=True)
+
+
+def truncate_json(value, max_items=JSON_MAX_ITEMS, max_string=JSON_MAX_STRING):
+    """Returns a copy of `value` with long lists, dicts and strings clipped, and whether anything was clipped."""
+    clipped = False
+
+    def clip(v):
+        nonlocal clipped
+        if isinstance(v, dict):
+            items = list(v.items())
+            out = {k: clip(item) for k, item in items[:max_items]}
+            if len(items) > max_items:
+                clipped = True
+                out["…"] = f"{len(items) - max_items} more keys"
+            return out
+        if isinstance(v, (list, tuple)):
+            out = [clip(item) for item in v[:max_items]]
+            if len(v) > max_items:
+                clipped = True
+                out.append(f"… {len(v) - max_items} more items")
+            return out
+        if isinstance(v, str) and len(v) > max_string:
+            clipped = True
+            return v[:max_string] + f"… ({len(v) - max_string} more characters)"
+        return v
+
+    return clip(value), clipped
+
+
+def render_json(value, key, file_name="data.json", expanded=True, container=st):
+    """Shows `value` with `st.json`, truncated when large, with a download of the full payload."""
+    shown, clipped = truncate_json(value)
+    if clipped:
+        container.caption("Large payload: showing a truncated view.")
+    container.json(shown, expanded=expanded)
+    if clipped:
+        container.download_button("⬇️ Download full JSON", json.dumps(value, indent=2, default=str),
+                                  file_name=file_name, mime="application/json", key=f"{key}_download")
+
+
+@st.cache_resource(show_spinner=False)
+def cached_session(base_url, api_token=None):
+    """`alation_client.get_session`, held by Streamlit so reruns and browser sessions share its connections."""
+    return get_session(base_url, api_token)
+
+
+def submit_job(kind, label, fn, key=None, options=None):
+    """`JobRegistry.submit`, recording the job as this browser session's. Raises ValueError like it."""
+    job = get_registry().submit(kind, label, fn, key, options)
+    st.session_state.setdefault(SESSION_JOBS_KEY, []).append(job.id)
+    return job
+
+
+def session_jobs(kind=None):
+    """Returns this browser session's jobs of `kind` (all when None), newest first."""
+    owned = set(st.session_state.get(SESSION_JOBS_KEY, ()))
+    return [job for job in get_registry().jobs(kind) if job.id in owned]
+
+
+def render_jobs(kind, render_job=None, run_every=JOBS_REFRESH_INTERVAL):
+    """Lists this session's background jobs of `kind` with their progress and a Cancel button.
+
+    The list is a fragment that redraws itself every `run_every` seconds
+    while a job is active, without rerunning the rest of the script, and
+    reruns the whole app when a job finishes. `render_job(job)` draws
+    app-specific details under each job; widget keys in it should include
+    `job.id`.
+    """
+    registry = get_registry()
+    state_key = f"active_jobs_{kind}"
+
+    def panel():
+        jobs = session_jobs(kind)
+        active = {job.id for job in jobs if job.active}
+        finished = st.session_state.get(state_key, set()) - active
+        st.session_state[state_key] = active
+        if finished:
+            st.rerun()
+        if not jobs:
+            st.caption("No background jobs yet.")
+            return
+        for job in jobs:
+            with st.container(border=True):
+                title, action = st.columns([5, 1])
+                title.markdown(f"{JOB_ICONS[job.status]} **{job.label}** · {job.status} · {job.elapsed_s:.0f}s")
+                if job.active and action.button("Cancel", key=f"cancel_job_{job.id}", disabled=job.is_cancelled()):
+                    job.cancel()
+                if job.active:
+                    st.progress(job.fraction, text=job.message or None)
+                elif job.message:
+                    st.caption(job.message)
+                if job.error:
+                    st.error(job.error)
+                if render_job:
+                    render_job(job)
+        if len(active) < len(jobs) and st.button("Clear finished jobs", key=f"clear_jobs_{kind}"):
+            registry.clear_finished(kind, {job.id for job in jobs})
+            st.rerun()
+
+    st.fragment(panel, run_every=run_every if any(job.active for job in session_jobs(kind)) else None,
+                key=f"jobs_{kind}")()
+
+
+def render_live_metrics(run_every=JOBS_REFRESH_INTERVAL):
+    """Draws the API metrics, redrawn every `run_every` seconds while this session has an active job."""
+    st.fragment(lambda: render_metrics(st.empty()),
+                run_every=run_every if any(job.active for job in session_jobs()) else None, key="api_metrics")()
@@ -0,0 +1,26 @@
+"""Shared fixtures: a local MockAlation per test and a throwaway cache directory.
+
+The cache path is set before any CSA module is imported, so checkpoint
+journals and snapshots land in a temporary directory too.
+"""
+import os
+import sys
+import tempfile
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+os.environ["ALATION_CSA_CACHE"] = os.path.join(tempfile.mkdtemp(prefix="alation_csa_tests_"), "metadata.sqlite3")
+sys.path[:0] = [ROOT, os.path.join(ROOT, "benchmarks")]
+
+from mock_alation import MockAlation, MockConfig  # noqa: E402
+
+TOKEN = "test-token"
+
+
+@pytest.fixture
+def mock_alation():
+    """A mock instance with one 42-member catalog set: 40 attributes (ids 1-42 but 21 and 42) and 2 tables."""
+    server = MockAlation(MockConfig(members=42, latency=0, jitter=0)).start()
+    yield server
+    server.stop()
@@ -0,0 +1,16 @@
+from conftest import TOKEN
+from alation_cache import MetadataCache
+from catalog_set_members import iter_catalog_set_members
+from catalog_set_sensitivity import bulk_update_sensitivity
+
+
+def test_writes_drop_cached_member_pages(mock_alation, tmp_path):
+    cache = MetadataCache(str(tmp_path / "metadata.sqlite3"))
+    members = list(iter_catalog_set_members(mock_alation.base_url, TOKEN, "7", cache=cache))
+    attr_ids = [member["id"] for member in members if member["otype"] == "attribute"]
+    assert not any(member["is_sensitive"] for member in members)
+
+    assert not bulk_update_sensitivity(mock_alation.base_url, TOKEN, attr_ids, "set", cache=cache)
+
+    members = list(iter_catalog_set_members(mock_alation.base_url, TOKEN, "7", cache=cache))
+    assert all(member["is_sensitive"] for member in members if member["otype"] == "attribute")
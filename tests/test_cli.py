@@ -0,0 +1,43 @@
+import json
+import time
+
+from conftest import TOKEN
+from mock_alation import MockAlation, MockConfig
+
+import csa_cli
+
+TENANT_ID = "123e4567-e89b-12d3-a456-426614174000"
+
+
+def test_cold_start_watches_every_task_at_once(tmp_path, capsys):
+    server = MockAlation(MockConfig(latency=0, jitter=0, task_duration=2.0)).start()
+    manifest = tmp_path / "products.json"
+    manifest.write_text(json.dumps([{"data_product_id": f"dp-{i}"} for i in range(6)]))
+    try:
+        started = time.monotonic()
+        code = csa_cli.main(["cold-start", "--manifest", str(manifest), "--base-url", server.base_url,
+                             "--tenant-id", TENANT_ID, "--user-id", "1", "--api-key", TOKEN,
+                             "--result-cache-database", "DB", "--result-cache-schema", "SCHEMA",
+                             "--concurrency", "2", "--wait", "--no-cache"])
+        elapsed = time.monotonic() - started
+    finally:
+        server.stop()
+
+    lines = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    assert code == 0
+    assert len(server.tasks) == 6
+    assert sorted(line["result"]["status"] for line in lines[:-1]) == ["SUCCESS"] * 6
+    assert lines[-1]["result"]["succeeded"] == 6
+    assert all("api_key" not in line.get("target", {}) for line in lines)
+    # Three rounds of two blocked submit-and-wait threads would take over 12s
+    assert elapsed < 10
+
+
+def test_get_docs_prints_one_line_per_document(mock_alation, capsys):
+    code = csa_cli.main(["get-docs", "--base-url", mock_alation.base_url, "--api-token", TOKEN, "--doc-id", "1-5",
+                         "--max-workers", "2", "--no-cache"])
+
+    lines = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    assert code == 0
+    assert sorted(line["target"]["doc_id"] for line in lines[:-1]) == [1, 2, 3, 4, 5]
+    assert lines[-1]["result"] == {"documents": 5, "failed": []}
@@ -0,0 +1,31 @@
+import pytest
+
+from conftest import TOKEN
+from mock_alation import MockAlation, MockConfig
+
+from cold_start import parse_cold_start_items, run_cold_starts
+
+TENANT_ID = "123e4567-e89b-12d3-a456-426614174000"
+
+
+def test_stopped_run_reports_submissions_in_flight():
+    # Every submission is in flight when the first one lands and the run stops
+    server = MockAlation(MockConfig(latency=0.3, jitter=0)).start()
+    items = [{"data_product_id": f"dp-{i}", "result_cache_database": "DB", "result_cache_schema": "SCHEMA"}
+             for i in range(4)]
+    try:
+        results, _ = run_cold_starts(server.base_url, TENANT_ID, items, "1", TOKEN, max_concurrency=4,
+                                     should_stop=lambda: True)
+    finally:
+        server.stop()
+
+    assert len(server.tasks) == 4
+    assert len(results) == 4
+    assert {result.task_id for result in results} == set(server.tasks)
+
+
+def test_parse_rejects_unknown_if_exists():
+    items = parse_cold_start_items("sales-dp\nsales-dp,DB,SCHEMA,archive", "DB", "SCHEMA")
+    assert [item["if_exists"] for item in items] == ["error", "archive"]
+    with pytest.raises(ValueError, match="Line 2"):
+        parse_cold_start_items("sales-dp\nfinance-dp,DB,SCHEMA,replace", "DB", "SCHEMA")
@@ -0,0 +1,121 @@
+from conftest import TOKEN
+from alation_cache import MetadataCache
+from mock_alation import MockAlation, MockConfig
+from sensitivity_job import iter_journaled_updates, open_journal, propagate_sensitivity, run_sensitivity_job
+
+CATALOG_SET_ID = "7"
+ATTRIBUTES = 40
+
+
+def interrupt(base_url, action, after, catalog_set_id=CATALOG_SET_ID):
+    """Runs `action` one write at a time and abandons it after `after` results, leaving its checkpoint."""
+    journal = open_journal(base_url, catalog_set_id, action)
+    results = iter_journaled_updates(journal, base_url, TOKEN, [i for i in range(1, 43) if i % 21], action,
+                                     max_workers=1)
+    for done, _ in enumerate(results, start=1):
+        if done == after:
+            results.close()
+            break
+
+
+def run(base_url, action, catalog_set_id=CATALOG_SET_ID, **options):
+    options.setdefault("cache", None)
+    return run_sensitivity_job(base_url, TOKEN, catalog_set_id, action, log=lambda message: None, **options)
+
+
+def test_interrupted_run_resumes_from_checkpoint(mock_alation):
+    interrupt(mock_alation.base_url, "set", after=20)
+    # The write in flight when the run stopped is checkpointed too
+    completed = open_journal(mock_alation.base_url, CATALOG_SET_ID, "set").completed
+    assert completed >= 20
+    summary = run(mock_alation.base_url, "set")
+    assert summary["written"] == ATTRIBUTES - completed
+    assert len(mock_alation.sensitive) == ATTRIBUTES
+
+
+def test_opposite_run_discards_checkpoint(mock_alation):
+    interrupt(mock_alation.base_url, "set", after=20)
+    run(mock_alation.base_url, "unset")
+    assert not mock_alation.sensitive
+
+    summary = run(mock_alation.base_url, "set")
+    assert summary["written"] == ATTRIBUTES
+    assert not summary["failures"]
+    assert len(mock_alation.sensitive) == ATTRIBUTES
+
+
+def test_run_on_overlapping_sets_discards_checkpoint(mock_alation):
+    interrupt(mock_alation.base_url, "set", after=20)
+    run(mock_alation.base_url, "unset", catalog_set_id=f"8,{CATALOG_SET_ID}")
+    assert not mock_alation.sensitive
+
+    summary = run(mock_alation.base_url, "set")
+    assert summary["written"] == ATTRIBUTES
+    assert len(mock_alation.sensitive) == ATTRIBUTES
+
+
+def test_checkpoint_is_shared_by_any_set_order(mock_alation):
+    interrupt(mock_alation.base_url, "set", after=20, catalog_set_id=f"{CATALOG_SET_ID},8")
+    assert open_journal(mock_alation.base_url, f"8,{CATALOG_SET_ID}", "set").completed >= 20
+
+
+def test_stale_checkpoint_is_not_resumed(mock_alation):
+    interrupt(mock_alation.base_url, "set", after=20)
+    mock_alation.sensitive.clear()
+
+    summary = run(mock_alation.base_url, "set", resume_max_age=0)
+    assert summary["written"] == ATTRIBUTES
+    assert len(mock_alation.sensitive) == ATTRIBUTES
+
+
+def test_finished_run_leaves_no_checkpoint(mock_alation):
+    run(mock_alation.base_url, "set")
+    assert not open_journal(mock_alation.base_url, CATALOG_SET_ID, "set").statuses
+
+
+def test_sync_keeps_trusting_flags_it_found_correct(tmp_path):
+    # Without is_sensitive in the payload, sync relies on the flags this tool wrote
+    server = MockAlation(MockConfig(members=42, latency=0, jitter=0, report_sensitivity=False)).start()
+    cache = MetadataCache(str(tmp_path / "metadata.sqlite3"))
+
+    def age(hours):
+        cache._conn.execute("UPDATE entries SET stored_at = stored_at - ?", (hours * 3600,))
+
+    try:
+        assert run(server.base_url, "set", cache=cache)["written"] == ATTRIBUTES
+        for _ in range(2):
+            # Nightly syncs: each record is older than a day by the second night unless the first one refreshed it
+            age(20)
+            summary = run(server.base_url, "set", cache=cache, sync=True)
+            assert summary["written"] == 0
+            assert summary["skipped"] == ATTRIBUTES
+
+        age(20)
+        summary = run(server.base_url, "set", cache=cache, sync=True, state_max_age=3600)
+        assert summary["written"] == ATTRIBUTES
+    finally:
+        server.stop()
+
+
+def propagate(base_url, *targets):
+    targets = [{"base_url": base_url, "catalog_set_id": CATALOG_SET_ID, "api_token": TOKEN, **target}
+               for target in targets]
+    return propagate_sensitivity(targets, "set", log=lambda message: None, cache=None)
+
+
+def test_propagate_writes_shared_sets_once(mock_alation):
+    report = propagate(mock_alation.base_url, {}, {"catalog_set_id": f"{CATALOG_SET_ID},8", "max_workers": 4})
+    assert report["ok"]
+    assert report["totals"]["duplicates"] == ATTRIBUTES
+    assert report["totals"]["written"] == ATTRIBUTES
+
+
+def test_propagate_rejects_conflicting_targets(mock_alation):
+    report = propagate(mock_alation.base_url, {}, {"catalog_set_id": "8", "api_token": "other-token"})
+    assert not report["ok"]
+    assert "api_token" in report["instances"][mock_alation.base_url]["error"]
+    assert "other-token" not in str(report)
+
+    report = propagate(mock_alation.base_url, {"max_workers": "4"}, {"catalog_set_id": "8", "max_workers": 16})
+    assert "max_workers values (4, 16)" in report["instances"][mock_alation.base_url]["error"]
+    assert not mock_alation.sensitive
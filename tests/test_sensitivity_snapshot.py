@@ -0,0 +1,30 @@
+from conftest import TOKEN
+from mock_alation import MockAlation, MockConfig
+
+from sensitivity_job import iter_journaled_updates, open_journal
+from sensitivity_snapshot import SnapshotRecorder, find_snapshot, revert_snapshot
+
+
+def test_cancelled_run_reverts_writes_in_flight():
+    # Latency keeps several of the 8 concurrent writes in flight when the run is cancelled
+    server = MockAlation(MockConfig(members=420, latency=0.02, jitter=0)).start()
+    try:
+        attr_ids = [i for i in range(1, 421) if i % 21]
+        journal = open_journal(server.base_url, "9", "set", fresh=True)
+        snapshot = SnapshotRecorder(server.base_url, ["9"], "set", dict.fromkeys(attr_ids, False))
+        late = []
+        results = iter_journaled_updates(journal, server.base_url, TOKEN, attr_ids, "set", max_workers=8,
+                                         snapshot=snapshot, on_late_result=late.append)
+        for done, _ in enumerate(results, start=1):
+            if done == 50:
+                results.close()
+                break
+
+        assert len(server.sensitive) == 50 + len(late)
+        assert len(snapshot.changed) == len(server.sensitive)
+        assert open_journal(server.base_url, "9", "set").completed == len(server.sensitive)
+
+        revert_snapshot(find_snapshot(snapshot.saved), TOKEN, max_workers=8)
+        assert not server.sensitive
+    finally:
+        server.stop()
@@ -0,0 +1,56 @@
+from conftest import TOKEN
+from mock_alation import MockAlation, MockConfig
+
+from Documents.Documents_CreateStubDocuments import MONITORING, create_stub_documents_chunked, plan_chunks, run_chunks
+
+
+def test_unfinished_jobs_are_monitored_not_resubmitted():
+    # Jobs outlast the two status polls allowed, so their outcome stays unknown
+    server = MockAlation(MockConfig(latency=0, jitter=0, job_duration=60)).start()
+    try:
+        summary = create_stub_documents_chunked(server.base_url, TOKEN, 10, 7, 72, 57, [58, 59], chunk_size=5,
+                                                max_retries=2, chunk_retries=1)
+    finally:
+        server.stop()
+
+    assert server.requests["create_documents"] == 2
+    assert not summary["failed_chunks"]
+    assert [chunk["start"] for chunk in sorted(summary["monitoring_chunks"], key=lambda c: c["start"])] == [0, 5]
+    assert summary["docs_created"] == 0
+
+
+def test_server_errors_are_monitored_not_resubmitted():
+    # A 500 may come after the chunk was accepted, so sending it again could duplicate its documents
+    server = MockAlation(MockConfig(latency=0, jitter=0, error_rate=1.0)).start()
+    try:
+        summary = create_stub_documents_chunked(server.base_url, TOKEN, 10, 7, 72, 57, [58, 59], chunk_size=5,
+                                                chunk_retries=1)
+    finally:
+        server.stop()
+
+    assert server.requests["create_documents"] == 2
+    assert not summary["failed_chunks"]
+    assert len(summary["monitoring_chunks"]) == 2
+
+
+def test_refused_connections_are_failed_chunks():
+    # Nothing listens on port 1, so the chunk certainly never reached a server
+    summary = create_stub_documents_chunked("http://127.0.0.1:1", TOKEN, 5, 7, 72, 57, [58, 59], chunk_size=5,
+                                            chunk_retries=0)
+
+    assert [chunk["start"] for chunk in summary["failed_chunks"]] == [0]
+    assert not summary["monitoring_chunks"]
+
+
+def test_stopped_run_reports_chunks_in_flight():
+    # Every chunk is in flight when the first one lands and the run stops
+    server = MockAlation(MockConfig(latency=0.3, jitter=0)).start()
+    try:
+        results = run_chunks(server.base_url, TOKEN, 20, 7, 72, 57, [58, 59], plan_chunks(20, 5), max_workers=4,
+                             should_stop=lambda: True)
+    finally:
+        server.stop()
+
+    assert server.requests["create_documents"] == 4
+    assert len(results) == 4
+    assert all(result.status == MONITORING and result.job_id for result in results)